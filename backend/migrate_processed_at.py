@@ -0,0 +1,60 @@
+"""
+One-off backfill converting legacy ISO-string processed_at values to timestamps.
+
+Articles stored before processed_at became a native Firestore timestamp hold it
+as an ISO string. Firestore orders strings and timestamps as different types, so
+those documents silently drop out of the /articles date filters and ordering.
+Run once after deploying, from the backend directory:
+
+    python migrate_processed_at.py --dry-run
+    python migrate_processed_at.py
+"""
+import argparse
+from datetime import datetime, timezone
+from src.config.firebase import db
+
+# Firestore rejects batched writes with more than 500 operations; stay well under it
+BATCH_SIZE = 400
+
+def parse_processed_at(value: str) -> datetime:
+    """Parse a legacy processed_at string; naive values were written as UTC."""
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--dry-run', action='store_true', help='report what would change without writing')
+    args = parser.parse_args()
+    
+    batch = db.batch()
+    pending = converted = skipped = 0
+    for doc in db.collection('processed_articles').select(['processed_at']).stream():
+        value = (doc.to_dict() or {}).get('processed_at')
+        if not isinstance(value, str):
+            continue
+        try:
+            processed_at = parse_processed_at(value)
+        except ValueError:
+            print(f"Skipping {doc.id}: unparseable processed_at {value!r}")
+            skipped += 1
+            continue
+        
+        converted += 1
+        if args.dry_run:
+            continue
+        batch.update(doc.reference, {'processed_at': processed_at})
+        pending += 1
+        if pending == BATCH_SIZE:
+            batch.commit()
+            batch = db.batch()
+            pending = 0
+    
+    if pending:
+        batch.commit()
+    action = "Would convert" if args.dry_run else "Converted"
+    print(f"{action} {converted} documents, skipped {skipped}")
+
+if __name__ == '__main__':
+    main()
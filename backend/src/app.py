@@ -2,21 +2,43 @@
 Main application module for the AI News Research Assistant.
 """
 import os
+import atexit
+import queue
+from logging.handlers import QueueHandler, QueueListener
 from pathlib import Path
 from dotenv import load_dotenv
 from quart import Quart
 from quart_cors import cors
 from .routes import main_bp
 from .scheduler import NewsScheduler
+from .utils.http_session import close_session
+from .news_processor.content_extractor import close_parse_pool
+from .utils.json_provider import OrjsonProvider
 import logging
 
-# Configure logging
+try:
+    import uvloop
+except ImportError:  # uvloop does not support Windows
+    uvloop = None
+
+# Configure logging; records are queued on the calling thread and written to
+# stderr by a listener thread, so log output never blocks the event loop
+_log_queue = queue.SimpleQueue()
+_log_handler = logging.StreamHandler()
+_log_handler.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
+_log_listener = QueueListener(_log_queue, _log_handler)
+_log_listener.start()
+atexit.register(_log_listener.stop)
 logging.basicConfig(
     level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    handlers=[QueueHandler(_log_queue)]
 )
 logger = logging.getLogger(__name__)
 
+# Use the libuv event loop for the aiohttp fan-out when available
+if uvloop is not None:
+    uvloop.install()
+
 def create_app():
     """Create and configure the Quart application."""
     # Load environment variables
@@ -25,6 +47,7 @@ def create_app():
     
     # Create the Quart app
     app = Quart(__name__)
+    app.json = OrjsonProvider(app)
     
     # Configure the app
     app.config.update(
@@ -58,6 +81,8 @@ def create_app():
         """Stop the scheduler when the application shuts down."""
         try:
             scheduler.stop()
+            await close_parse_pool()
+            await close_session()
             logger.info("Application stopped successfully")
         except Exception as e:
             logger.error(f"Error stopping application: {str(e)}")
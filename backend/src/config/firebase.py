@@ -1,5 +1,5 @@
 import firebase_admin
-from firebase_admin import credentials, firestore
+from firebase_admin import credentials, firestore, firestore_async
 import os
 from dotenv import load_dotenv
 
@@ -32,4 +32,7 @@ def initialize_firebase():
         raise
 
 # Initialize Firebase and get Firestore instance
-db = initialize_firebase() 
\ No newline at end of file
+db = initialize_firebase()
+
+# Async client for request handlers, so Firestore round trips never block the event loop
+async_db = firestore_async.client()
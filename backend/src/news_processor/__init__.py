@@ -6,5 +6,6 @@ Handles news aggregation, content extraction, and summarization.
 from .news_fetcher import NewsFetcher
 from .content_extractor import ContentExtractor
 from .summarizer import Summarizer
+from .processor import Processor
 
-__all__ = ['NewsFetcher', 'ContentExtractor', 'Summarizer'] 
\ No newline at end of file
+__all__ = ['NewsFetcher', 'ContentExtractor', 'Summarizer', 'Processor'] 
\ No newline at end of file
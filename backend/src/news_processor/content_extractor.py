@@ -1,21 +1,201 @@
 """
-Content extractor module that uses Scrapy to extract article content.
+Content extractor module that uses selectolax to extract article content.
 """
 import os
-from typing import Dict, Optional
+import asyncio
+import time
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
 import aiohttp
 import logging
-from urllib.parse import urlparse
+from urllib.parse import urlparse, urlsplit, urlunsplit, parse_qsl, urlencode
 import re
-from scrapy import Selector
+from html import unescape
+from selectolax.parser import HTMLParser
+from ..utils.http_session import get_session
+from ..utils.singleflight import singleflight
 
 logger = logging.getLogger(__name__)
 
+# Common content containers, combined so the tree is searched in a single pass
+_CONTENT_SELECTOR = ', '.join((
+    'article',
+    'main',
+    '.article-content',
+    '.post-content',
+    '.entry-content',
+    '#content'
+))
+
+# Upper bound on how much of a page is downloaded and parsed
+_MAX_CONTENT_BYTES = 2_000_000
+_READ_CHUNK_SIZE = 65536
+
+# Query parameters that only track the click and never change the article
+_TRACKING_PARAMS = frozenset({'fbclid', 'gclid', 'ocid', 'cmpid', 'mc_cid', 'mc_eid'})
+
+# Social title metadata lives in <head>, so only the start of the page is scanned
+_HEAD_SCAN_CHARS = 8192
+_META_TITLE_RES = (
+    re.compile(r'<meta[^>]+property=["\']og:title["\'][^>]+content=["\']([^"\']+)', re.IGNORECASE),
+    re.compile(r'<meta[^>]+name=["\']twitter:title["\'][^>]+content=["\']([^"\']+)', re.IGNORECASE)
+)
+
+_WHITESPACE_RE = re.compile(r'\s+')
+_UNWANTED_RE = re.compile(r'Advertisement|Sponsored|Related.*', re.IGNORECASE)
+_URL_RE = re.compile(r'https?://\S+')
+
+def _extract_title(tree: HTMLParser, html: str) -> str:
+    """Extract the article title."""
+    # Try different title elements
+    for tag in ('h1', 'title'):
+        node = tree.css_first(tag)
+        if node is not None:
+            title = node.text(strip=True)
+            if title:
+                return title
+    
+    # Scan the head for social metadata before querying the tree
+    head = html[:_HEAD_SCAN_CHARS]
+    for title_re in _META_TITLE_RES:
+        match = title_re.search(head)
+        if match:
+            title = unescape(match.group(1)).strip()
+            if title:
+                return title
+    
+    # Fall back to selector lookups for unusual attribute orders or long heads
+    for meta_selector in ('meta[property="og:title"]', 'meta[name="twitter:title"]'):
+        node = tree.css_first(meta_selector)
+        if node is not None:
+            title = node.attributes.get('content')
+            if title:
+                return title.strip()
+    
+    return ""
+
+def _extract_main_content(tree: HTMLParser) -> str:
+    """Extract the main content of the article."""
+    # First content container in document order
+    content = tree.css_first(_CONTENT_SELECTOR)
+    if content is not None:
+        # Extract text from all paragraphs within the content
+        paragraphs = [p.text() for p in content.css('p')]
+        if paragraphs:
+            return ' '.join(paragraphs)
+    
+    # Fallback: try to find all paragraphs
+    paragraphs = [p.text() for p in tree.css('p')]
+    if paragraphs:
+        return ' '.join(paragraphs)
+    
+    return ""
+
+def _clean_content(content: str) -> str:
+    """Clean and format the extracted content."""
+    if not content:
+        return ""
+    
+    # Remove extra whitespace
+    content = _WHITESPACE_RE.sub(' ', content)
+    
+    # Remove common unwanted elements
+    content = _UNWANTED_RE.sub('', content)
+    
+    # Remove URLs
+    content = _URL_RE.sub('', content)
+    
+    return content.strip()
+
+def _parse_html(body: bytes, charset: Optional[str]) -> Tuple[str, str]:
+    """
+    Parse an article page and return its title and cleaned content.
+    
+    Runs in a worker process so parsing does not block the event loop. The raw
+    body is decoded here so the event loop process never holds a decoded copy.
+    """
+    html = body.decode(charset or 'utf-8', errors='replace')
+    tree = HTMLParser(html)
+    title = _extract_title(tree, html)
+    content = _clean_content(_extract_main_content(tree))
+    return title, content
+
+# Worker processes for CPU-bound HTML parsing, shared by every extractor and
+# started on first use. Workers come from a forkserver (spawn where that is not
+# available) rather than a fork of this process, which by then is running the
+# event loop and Firestore/gRPC threads whose locks a forked child could inherit
+_parse_pool: Optional[ProcessPoolExecutor] = None
+
+def _get_parse_pool() -> ProcessPoolExecutor:
+    """Return the shared HTML parsing process pool, creating it on first use."""
+    global _parse_pool
+    if _parse_pool is None:
+        start_method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+        _parse_pool = ProcessPoolExecutor(
+            max_workers=os.cpu_count(),
+            mp_context=multiprocessing.get_context(start_method)
+        )
+        logger.info(f"Started HTML parsing pool ({start_method})")
+    return _parse_pool
+
+async def close_parse_pool():
+    """Shut down the shared HTML parsing process pool."""
+    global _parse_pool
+    if _parse_pool is not None:
+        _parse_pool.shutdown(wait=False, cancel_futures=True)
+        logger.info("Closed HTML parsing pool")
+    _parse_pool = None
+
 class ContentExtractor:
-    def __init__(self):
+    def __init__(self, session: Optional[aiohttp.ClientSession] = None, concurrency_limit: int = 10,
+                 cache_size: int = 1024, cache_ttl: int = 3600):
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         }
+        self.timeout = aiohttp.ClientTimeout(total=10, connect=3)
+        # Falls back to the application-wide session when none is injected
+        self._session = session
+        # Caps in-flight fetches when callers fan out with asyncio.gather
+        self._semaphore = asyncio.Semaphore(concurrency_limit)
+        # LRU cache of extracted content keyed by normalized URL
+        self._cache: OrderedDict[str, tuple] = OrderedDict()
+        self._cache_size = cache_size
+        self._cache_ttl = cache_ttl
+
+    async def _get_session(self) -> aiohttp.ClientSession:
+        """Return the injected HTTP session or the shared one."""
+        return self._session or await get_session()
+
+    @staticmethod
+    def normalize_url(url: str) -> str:
+        """Normalize a URL so tracking variants of the same article compare equal."""
+        parts = urlsplit(url.strip())
+        query = [
+            (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+            if not key.lower().startswith('utm_') and key.lower() not in _TRACKING_PARAMS
+        ]
+        return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path, urlencode(query), ''))
+
+    def _get_cached(self, key: str) -> Optional[Dict]:
+        """Return a cached extraction result if present and not expired."""
+        entry = self._cache.get(key)
+        if entry is None:
+            return None
+        expires_at, result = entry
+        if expires_at < time.monotonic():
+            del self._cache[key]
+            return None
+        self._cache.move_to_end(key)
+        return dict(result)
+
+    def _set_cached(self, key: str, result: Dict):
+        """Store an extraction result, evicting the least recently used entry."""
+        self._cache[key] = (time.monotonic() + self._cache_ttl, result)
+        self._cache.move_to_end(key)
+        while len(self._cache) > self._cache_size:
+            self._cache.popitem(last=False)
 
     async def extract_content(self, url: str) -> Optional[Dict]:
         """
@@ -31,37 +211,79 @@ class ContentExtractor:
             logger.info(f"Extracting content from URL: {url}")
             
             # Validate URL
-            if not self._is_valid_url(url):
+            if not self.is_valid_url(url):
                 logger.error(f"Invalid URL: {url}")
                 return None
 
+            # Serve repeated URLs from the cache
+            cache_key = self.normalize_url(url)
+            cached = self._get_cached(cache_key)
+            if cached is not None:
+                logger.info(f"Using cached content for URL: {url}")
+                return cached
+
+            # Concurrent requests for the same article share one fetch
+            result = await singleflight(
+                ('extract_content', id(self), cache_key),
+                lambda: self._fetch_content(url, cache_key)
+            )
+            return dict(result) if result is not None else None
+
+        except Exception as e:
+            logger.error(f"Unexpected error extracting content from {url}: {str(e)}")
+            return None
+
+    async def _fetch_content(self, url: str, cache_key: str) -> Optional[Dict]:
+        """
+        Download and parse an article, caching the result under cache_key.
+        
+        Args:
+            url: URL of the news article
+            cache_key: Normalized URL used as the cache key
+            
+        Returns:
+            Dictionary containing the extracted content or None if extraction fails
+        """
+        try:
             # Fetch the webpage
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url, headers=self.headers, timeout=10) as response:
+            session = await self._get_session()
+            async with self._semaphore:
+                async with session.get(url, headers=self.headers, timeout=self.timeout) as response:
                     response.raise_for_status()
-                    html = await response.text()
-            
-            # Parse the HTML using Scrapy Selector
-            selector = Selector(text=html)
-            
-            # Extract title
-            title = self._extract_title(selector)
-            
-            # Extract main content
-            content = self._extract_main_content(selector)
+                    
+                    # Skip images, PDFs and other non-HTML payloads; media types are
+                    # case-insensitive, and a missing header is given the benefit of the doubt
+                    content_type = response.headers.get('Content-Type', '').lower()
+                    if content_type and 'html' not in content_type:
+                        logger.warning(f"Skipping non-HTML content ({content_type}) from URL: {url}")
+                        return None
+                    
+                    # Read the body incrementally, stopping at the size cap
+                    body = bytearray()
+                    async for chunk in response.content.iter_chunked(_READ_CHUNK_SIZE):
+                        body += chunk
+                        if len(body) >= _MAX_CONTENT_BYTES:
+                            logger.warning(f"Truncating response from URL {url} at {_MAX_CONTENT_BYTES} bytes")
+                            del body[_MAX_CONTENT_BYTES:]
+                            break
+                    charset = response.charset
             
-            # Clean and format the content
-            cleaned_content = self._clean_content(content)
+            # Parse and clean the HTML off the event loop
+            loop = asyncio.get_running_loop()
+            title, cleaned_content = await loop.run_in_executor(_get_parse_pool(), _parse_html, body, charset)
+            del body
             
             if not cleaned_content:
                 logger.warning(f"No content extracted from URL: {url}")
                 return None
             
-            return {
+            result = {
                 "title": title,
                 "content": cleaned_content,
                 "url": url
             }
+            self._set_cached(cache_key, result)
+            return result
 
         except aiohttp.ClientError as e:
             logger.error(f"Error fetching URL {url}: {str(e)}")
@@ -70,70 +292,11 @@ class ContentExtractor:
             logger.error(f"Unexpected error extracting content from {url}: {str(e)}")
             return None
 
-    def _is_valid_url(self, url: str) -> bool:
+    @staticmethod
+    def is_valid_url(url: str) -> bool:
         """Validate the URL format."""
         try:
             result = urlparse(url)
             return all([result.scheme, result.netloc])
         except:
-            return False
-
-    def _extract_title(self, selector: Selector) -> str:
-        """Extract the article title."""
-        # Try different title selectors
-        title_selectors = [
-            'h1::text',
-            'title::text',
-            'meta[property="og:title"]::attr(content)',
-            'meta[name="twitter:title"]::attr(content)'
-        ]
-        
-        for selector_expr in title_selectors:
-            title = selector.css(selector_expr).get()
-            if title:
-                return title.strip()
-        
-        return ""
-
-    def _extract_main_content(self, selector: Selector) -> str:
-        """Extract the main content of the article."""
-        # Common content selectors
-        content_selectors = [
-            'article',
-            'main',
-            '.article-content',
-            '.post-content',
-            '.entry-content',
-            '#content'
-        ]
-        
-        for selector_expr in content_selectors:
-            content = selector.css(selector_expr)
-            if content:
-                # Extract text from all paragraphs within the content
-                paragraphs = content.css('p::text').getall()
-                if paragraphs:
-                    return ' '.join(paragraphs)
-        
-        # Fallback: try to find all paragraphs
-        paragraphs = selector.css('p::text').getall()
-        if paragraphs:
-            return ' '.join(paragraphs)
-        
-        return ""
-
-    def _clean_content(self, content: str) -> str:
-        """Clean and format the extracted content."""
-        if not content:
-            return ""
-            
-        # Remove extra whitespace
-        content = re.sub(r'\s+', ' ', content)
-        
-        # Remove common unwanted elements
-        content = re.sub(r'Advertisement|Sponsored|Related.*', '', content, flags=re.IGNORECASE)
-        
-        # Remove URLs
-        content = re.sub(r'http[s]?://\S+', '', content)
-        
-        return content.strip() 
\ No newline at end of file
+            return False 
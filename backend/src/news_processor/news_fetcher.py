@@ -2,33 +2,51 @@
 News fetcher module that uses SerpApi to search for news articles.
 """
 import os
-from typing import List, Dict
+from types import MappingProxyType
+from typing import List, Dict, Optional
 import aiohttp
+import orjson
+from cachetools import TTLCache
 from datetime import datetime, timedelta
 import logging
+from ..utils.http_session import get_session
+from ..utils.singleflight import singleflight
 
 logger = logging.getLogger(__name__)
 
+# Fields kept from each SerpApi news result
+_ARTICLE_KEYS = ("title", "link", "source", "date", "snippet", "thumbnail")
+
+# Recent search results keyed by (normalized query, time period), shared across instances
+_SEARCH_CACHE_TTL = 900
+_search_cache = TTLCache(maxsize=128, ttl=_SEARCH_CACHE_TTL)
+
 class NewsFetcher:
-    def __init__(self):
+    def __init__(self, session: Optional[aiohttp.ClientSession] = None):
+        # Falls back to the application-wide session when none is injected
+        self._session = session
         self.api_key = os.getenv('SERPAPI_KEY')
         if not self.api_key:
             raise ValueError("SERPAPI_KEY environment variable is not set")
         
         self.base_url = "https://serpapi.com/search"
-        self.search_params = {
+        # Read-only so per-call params can be built by unpacking without copying first
+        self.search_params = MappingProxyType({
             "engine": "google",
             "api_key": self.api_key,
             "tbm": "nws",  # news search
             "num": 10,     # number of results
             "gl": "us",    # country
             "hl": "en"     # language
-        }
+        })
 
     async def search_news(self, query: str, time_period: str = "week") -> List[Dict]:
         """
         Search for news articles related to the given query.
         
+        Results are cached for a few minutes, and concurrent identical searches
+        wait for the first one instead of each calling SerpApi.
+        
         Args:
             query: Search query string
             time_period: Time period for news (day, week, month)
@@ -36,6 +54,19 @@ class NewsFetcher:
         Returns:
             List of news articles with their details
         """
+        key = (query.strip().lower(), time_period)
+        results = _search_cache.get(key)
+        if results is None:
+            results = await singleflight(('search_news', key), lambda: self._search_news(query, time_period))
+            _search_cache[key] = results
+        else:
+            logger.info(f"Using cached news results for query: {query}")
+        
+        # Callers may enrich the returned articles, so hand out copies
+        return [dict(article) for article in results]
+
+    async def _search_news(self, query: str, time_period: str) -> List[Dict]:
+        """Call SerpApi for the given query and time period."""
         try:
             # Calculate date range based on time_period
             end_date = datetime.now()
@@ -49,36 +80,29 @@ class NewsFetcher:
                 start_date = end_date - timedelta(days=7)  # default to week
 
             # Add date range to search parameters
-            params = self.search_params.copy()
-            params.update({
+            params = {
+                **self.search_params,
                 "q": query,
                 "tbs": f"cdr:1,cd_min:{start_date.strftime('%m/%d/%Y')},cd_max:{end_date.strftime('%m/%d/%Y')}"
-            })
+            }
 
             logger.info(f"Searching news for query: {query}")
             
-            async with aiohttp.ClientSession() as session:
-                async with session.get(self.base_url, params=params) as response:
-                    response.raise_for_status()
-                    data = await response.json()
-                    
-                    news_results = data.get("news_results", [])
-                    
-                    # Process and format the results
-                    formatted_results = []
-                    for article in news_results:
-                        formatted_article = {
-                            "title": article.get("title", ""),
-                            "link": article.get("link", ""),
-                            "source": article.get("source", ""),
-                            "date": article.get("date", ""),
-                            "snippet": article.get("snippet", ""),
-                            "thumbnail": article.get("thumbnail", "")
-                        }
-                        formatted_results.append(formatted_article)
-                    
-                    logger.info(f"Found {len(formatted_results)} news articles")
-                    return formatted_results
+            session = self._session or await get_session()
+            async with session.get(self.base_url, params=params) as response:
+                response.raise_for_status()
+                data = orjson.loads(await response.read())
+                
+                news_results = data.get("news_results", [])
+                
+                # Process and format the results
+                formatted_results = [
+                    {key: article.get(key, "") for key in _ARTICLE_KEYS}
+                    for article in news_results
+                ]
+                
+                logger.info(f"Found {len(formatted_results)} news articles")
+                return formatted_results
 
         except aiohttp.ClientError as e:
             logger.error(f"Error fetching news: {str(e)}")
@@ -1,12 +1,12 @@
 """
 Main processor module that orchestrates the news processing pipeline.
 """
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Tuple
 from .news_fetcher import NewsFetcher
 from .content_extractor import ContentExtractor
 from .summarizer import Summarizer
 import logging
-from datetime import datetime
+from datetime import datetime, timezone
 import asyncio
 
 logger = logging.getLogger(__name__)
@@ -16,14 +16,23 @@ class Processor:
         self.news_fetcher = NewsFetcher()
         self.content_extractor = ContentExtractor()
         self.summarizer = Summarizer()
+        # Seconds to wait for article extraction before summarizing what has arrived
+        self.extraction_deadline = 30
 
-    async def process_topic(self, topic: str, time_period: str = "week") -> List[Dict]:
+    async def _extract_article(self, article: Dict) -> Tuple[Dict, Optional[Dict]]:
+        """Extract content for an article, keeping the article alongside the result."""
+        return article, await self.content_extractor.extract_content(article['link'])
+
+    async def process_topic(self, topic: str, time_period: str = "week",
+                            min_articles: Optional[int] = None) -> List[Dict]:
         """
         Process a topic by fetching news, extracting content, and generating summaries.
         
         Args:
             topic: Topic to search for
             time_period: Time period for news (day, week, month)
+            min_articles: Start summarizing once this many articles have content
+                instead of waiting for every fetch
             
         Returns:
             List of processed articles with summaries
@@ -37,35 +46,61 @@ class Processor:
                 logger.warning(f"No news articles found for topic: {topic}")
                 return []
             
-            # Step 2: Extract content from each article concurrently
+            # Drop invalid links and tracking-parameter duplicates before fanning out
+            unique_articles = {}
+            for article in news_articles:
+                link = article.get('link', '')
+                if not self.content_extractor.is_valid_url(link):
+                    logger.warning(f"Skipping article with invalid URL: {link}")
+                    continue
+                unique_articles.setdefault(self.content_extractor.normalize_url(link), article)
+            news_articles = list(unique_articles.values())
+            
+            # Step 2: Extract content concurrently, collecting results as they arrive
             content_tasks = [
-                await self.content_extractor.extract_content(article['link'])
+                asyncio.ensure_future(self._extract_article(article))
                 for article in news_articles
             ]
-            content_results = await asyncio.gather(*content_tasks, return_exceptions=True)
+            target = min(min_articles or len(content_tasks), len(content_tasks))
             
-            # Combine articles with their content
             articles_with_content = []
-            for article, content in zip(news_articles, content_results):
-                if isinstance(content, Exception):
-                    logger.error(f"Error extracting content for {article['link']}: {str(content)}")
-                    continue
-                if content:
-                    articles_with_content.append({
-                        **article,
-                        **content
-                    })
+            try:
+                for next_result in asyncio.as_completed(content_tasks, timeout=self.extraction_deadline):
+                    try:
+                        article, content = await next_result
+                    except asyncio.TimeoutError:
+                        raise
+                    except Exception as e:
+                        logger.error(f"Error extracting content: {str(e)}")
+                        continue
+                    if content:
+                        # search_news hands out fresh copies, so the article can be extended in place
+                        article.update(content)
+                        articles_with_content.append(article)
+                    if len(articles_with_content) >= target:
+                        break
+            except asyncio.TimeoutError:
+                logger.warning(f"Extraction deadline reached for topic: {topic}, continuing with {len(articles_with_content)} articles")
+            finally:
+                # Cancel stragglers so they release their pooled connections
+                for task in content_tasks:
+                    if not task.done():
+                        task.cancel()
             
             if not articles_with_content:
                 logger.warning(f"No content extracted for topic: {topic}")
                 return []
             
             # Step 3: Generate summaries
-            summarized_articles = await self.summarizer.batch_summarize(articles_with_content)
+            summary_result = await self.summarizer.batch_summarize(articles_with_content)
+            summarized_articles = summary_result.get('articles', [])
             
-            # Add processing metadata
+            # Add processing metadata; one timestamp covers the whole batch, stored
+            # as a native Firestore timestamp so range queries compare it directly
+            processed_at = datetime.now(timezone.utc)
             for article in summarized_articles:
-                article['processed_at'] = datetime.utcnow().isoformat()
+                article['summary'] = summary_result.get('summary', '')
+                article['processed_at'] = processed_at
                 article['topic'] = topic
             
             logger.info(f"Successfully processed {len(summarized_articles)} articles for topic: {topic}")
@@ -77,7 +112,7 @@ class Processor:
 
     async def process_topics(self, topics: Dict[str, str]) -> Dict[str, List[Dict[str, Any]]]:
         """
-        Process multiple topics and return their articles.
+        Process multiple topics concurrently and return their articles.
         
         Args:
             topics: Dictionary mapping topic values to their search terms
@@ -85,61 +120,88 @@ class Processor:
         Returns:
             Dictionary mapping topic values to lists of processed articles
         """
-        results = {}
+        topic_values = list(topics)
+        topic_results = await asyncio.gather(
+            *[self._process_search_terms(topic_value, topics[topic_value]) for topic_value in topic_values],
+            return_exceptions=True
+        )
         
-        for topic_value, search_terms in topics.items():
-            try:
-                logger.info(f"Processing topic: {topic_value}")
-                
-                # Fetch news articles for the topic
-                articles = await self.news_fetcher.search_news(search_terms)
-                if not articles:
-                    logger.warning(f"No articles found for topic: {topic_value}")
-                    results[topic_value] = []
-                    continue
-                
-                # Process and summarize articles
+        results = {}
+        for topic_value, processed_articles in zip(topic_values, topic_results):
+            if isinstance(processed_articles, Exception):
+                logger.error(f"Error processing topic {topic_value}: {str(processed_articles)}")
                 processed_articles = []
-                for article in articles:
-                    try:
-                        # Validate article data
-                        if not article or not isinstance(article, dict):
-                            logger.warning("Invalid article data received")
-                            continue
-                            
-                        url = article.get('url')
-                        if not url:
-                            logger.warning("Article missing URL")
-                            continue
-                            
-                        # Extract article content
-                        content = await self.content_extractor.extract_content(url)
-                        if not content:
-                            logger.warning(f"Failed to extract content from URL: {url}")
-                            continue
-                        
-                        # Generate summary
-                        summary = await self.summarizer.summarize(content)
-                        
-                        # Combine article data with content and summary
-                        processed_article = {
-                            **article,
-                            'content': content,
-                            'summary': summary
-                        }
-                        processed_articles.append(processed_article)
-                        
-                    except Exception as e:
-                        logger.error(f"Error processing article: {str(e)}")
-                        continue
-                
-                # Use the topic value (string) as the key
-                results[topic_value] = processed_articles
-                logger.info(f"Successfully processed {len(processed_articles)} articles for topic: {topic_value}")
-                
-            except Exception as e:
-                logger.error(f"Error processing topic {topic_value}: {str(e)}")
-                results[topic_value] = []
+            # Use the topic value (string) as the key
+            results[topic_value] = processed_articles
+        
+        return results
+
+    async def _process_search_terms(self, topic_value: str, search_terms: str) -> List[Dict[str, Any]]:
+        """
+        Fetch, extract and summarize the articles for a single topic.
+        
+        Args:
+            topic_value: Topic the articles belong to
+            search_terms: Search query for the topic
+            
+        Returns:
+            List of processed articles with per-article summaries
+        """
+        logger.info(f"Processing topic: {topic_value}")
+        
+        # Fetch news articles for the topic
+        articles = await self.news_fetcher.search_news(search_terms)
+        if not articles:
+            logger.warning(f"No articles found for topic: {topic_value}")
+            return []
+        
+        # Drop invalid links and tracking-parameter duplicates before fanning out
+        unique_articles = {}
+        for article in articles:
+            if not article or not isinstance(article, dict):
+                logger.warning("Invalid article data received")
+                continue
+            link = article.get('link', '')
+            if not self.content_extractor.is_valid_url(link):
+                logger.warning(f"Skipping article with invalid URL: {link}")
+                continue
+            unique_articles.setdefault(self.content_extractor.normalize_url(link), article)
+        articles = list(unique_articles.values())
+        
+        # Extract every article's content concurrently
+        contents = await asyncio.gather(
+            *[self.content_extractor.extract_content(article['link']) for article in articles],
+            return_exceptions=True
+        )
+        
+        articles_with_content = []
+        for article, content in zip(articles, contents):
+            if isinstance(content, Exception):
+                logger.error(f"Error extracting content from URL {article['link']}: {str(content)}")
+                continue
+            if not content:
+                logger.warning(f"Failed to extract content from URL: {article['link']}")
+                continue
+            articles_with_content.append((article, content))
+        
+        if not articles_with_content:
+            logger.warning(f"No content extracted for topic: {topic_value}")
+            return []
+        
+        # Small sets share one sectioned Gemini call, larger ones fan out concurrently
+        summaries = await self.summarizer.summarize_many([content for _, content in articles_with_content])
+        
+        # Combine article data with content and summary
+        processed_articles = []
+        for (article, content), summary in zip(articles_with_content, summaries):
+            if summary is None:
+                logger.error(f"Failed to summarize article: {article['link']}")
                 continue
+            processed_articles.append({
+                **article,
+                'content': content,
+                'summary': summary
+            })
         
-        return results 
\ No newline at end of file
+        logger.info(f"Successfully processed {len(processed_articles)} articles for topic: {topic_value}")
+        return processed_articles 
@@ -2,29 +2,96 @@
 Summarizer module that uses Gemini API to generate content summaries.
 """
 import os
-from typing import Dict, Optional, List
+import re
+import random
+import hashlib
+from collections import OrderedDict
+from functools import lru_cache
+from typing import AsyncIterator, Dict, Optional, List, Tuple
 import google.generativeai as genai
+from google.api_core import exceptions as google_exceptions
+from cachetools import TTLCache
 import logging
 import asyncio
-import tiktoken
+import traceback
 
 logger = logging.getLogger(__name__)
 
+# Token counts keyed by a digest of the counted text, shared across instances
+_TOKEN_COUNT_CACHE_SIZE = 4096
+_token_counts: OrderedDict = OrderedDict()
+
+# Section markers used to pack several articles into one Gemini call
+_ARTICLE_DELIMITER = "===ARTICLE {}==="
+_ARTICLE_SECTION_RE = re.compile(r'^\s*===ARTICLE (\d+)===\s*$', re.MULTILINE)
+
+# Attempts per Gemini call when the API reports the quota is exhausted
+_MAX_GENERATE_ATTEMPTS = 5
+
+@lru_cache(maxsize=None)
+def _get_encoding(name: str):
+    """Load a tiktoken encoding once per process, importing tiktoken on first use."""
+    import tiktoken
+    return tiktoken.get_encoding(name)
+
+@lru_cache(maxsize=None)
+def _get_model(api_key: str, name: Optional[str]) -> genai.GenerativeModel:
+    """Configure the Gemini API and build a model client once per key and model name."""
+    genai.configure(api_key=api_key)
+    return genai.GenerativeModel(name)
+
+def _format_article(article: Dict) -> str:
+    """Format an article as the text block sent to Gemini."""
+    return (
+        f"Title: {article.get('title', 'Untitled')}\n"
+        f"Source: {article.get('source', 'Unknown')}\n"
+        f"Date: {article.get('date', 'Unknown')}\n"
+        f"Content: {article.get('content', '')}\n"
+        f"Link: {article.get('link', '')}"
+    )
+
+def _split_sections(text: str) -> Dict[int, str]:
+    """
+    Split a sectioned Gemini response into the text under each article marker.
+    
+    Args:
+        text: Response whose sections start with _ARTICLE_DELIMITER lines
+        
+    Returns:
+        Section text keyed by article number; text before the first marker is dropped
+    """
+    # re.split yields [preamble, number, text, number, text, ...]
+    parts = _ARTICLE_SECTION_RE.split(text)
+    return {int(number): section.strip() for number, section in zip(parts[1::2], parts[2::2])}
+
 class Summarizer:
     def __init__(self):
         self.api_key = os.getenv('GEMINI_API_KEY')
         if not self.api_key:
             raise ValueError("GEMINI_API_KEY environment variable is not set")
         
-        # Configure the Gemini API
-        genai.configure(api_key=self.api_key)
-        self.model = genai.GenerativeModel(os.getenv('GEMINI_MODEL'))
+        # Configure the Gemini API; the client is shared by every Summarizer
+        self.model = _get_model(self.api_key, os.getenv('GEMINI_MODEL'))
         
         # Token limit configuration
         self.max_tokens = 50000  # Conservative limit for Gemini 1.5 Flash
-        self.encoding = tiktoken.get_encoding("cl100k_base")  # Using OpenAI's encoding as a proxy
+        self.encoding_name = "cl100k_base"  # Using OpenAI's encoding as a proxy
+        
+        # Prompt size budget; smaller prompts mean faster and cheaper Gemini calls
+        self.max_article_chars = 4000
+        self.max_prompt_chars = 60000
+        
+        # Article sets smaller than this are summarized in one sectioned call
+        self.batch_threshold = 5
         
-        # Define the summarization prompt
+        # Recent batch summaries keyed by the set of article links or content digests
+        self._summary_cache = TTLCache(maxsize=512, ttl=3600)
+        
+        # Bound concurrent Gemini calls to stay within the API rate limits
+        self._semaphore = asyncio.Semaphore(int(os.getenv('GEMINI_MAX_CONCURRENCY', 5)))
+        
+        # Define the summarization instructions; kept byte-identical across calls so
+        # Gemini can reuse the cached prefix, with the articles sent as a separate part
         self.summary_prompt = """
         # Role
         You are a research assistant who is working for a busy executive.
@@ -44,56 +111,213 @@ class Summarizer:
 
         # Output Format
         You need to provide an output summary in html format, following this markdown template (note that the template is in markdown format, but the output should be in html format):
+        """
+        
+        # Appended after the fixed instructions when several articles share one call
+        self.sections_prompt = (
+            "Summarize each article separately. Start each summary with the marker line "
+            "of its article, for example " + _ARTICLE_DELIMITER.format(1) + ", and write "
+            "nothing outside the marked sections."
+        )
+
+    def _build_prompt(self, content: str) -> List[str]:
+        """Build the prompt parts: the fixed instructions followed by the articles."""
+        return [self.summary_prompt, f"Articles:\n{content}"]
+
+    async def _generate(self, prompt: List[str]):
+        """
+        Call Gemini for the given prompt, respecting the concurrency limit.
+        
+        Quota errors are retried with jittered exponential backoff; the slot is
+        released while waiting so other calls are not held up.
+        """
+        for attempt in range(_MAX_GENERATE_ATTEMPTS):
+            try:
+                async with self._semaphore:
+                    return await self.model.generate_content_async(prompt)
+            except google_exceptions.ResourceExhausted:
+                if attempt == _MAX_GENERATE_ATTEMPTS - 1:
+                    raise
+                delay = 2 ** attempt + random.random()
+                logger.warning(f"Gemini quota exhausted, retrying in {delay:.1f}s")
+                await asyncio.sleep(delay)
 
-        Articles:
-        {content}
+    def _truncate(self, text: str, max_chars: int) -> str:
         """
+        Shorten text to max_chars, keeping the lead and the conclusion.
+        
+        Args:
+            text: Text to shorten
+            max_chars: Maximum number of characters to keep
+            
+        Returns:
+            The text itself if short enough, otherwise its first ~70% and last ~30%
+        """
+        if len(text) <= max_chars:
+            return text
+        head_chars = int(max_chars * 0.7)
+        tail_chars = max_chars - head_chars
+        return f"{text[:head_chars]} ... {text[-tail_chars:]}"
+
+    @property
+    def encoding(self):
+        """Tokenizer used for exact counts, loaded on first use."""
+        return _get_encoding(self.encoding_name)
 
     def _count_tokens(self, text: str) -> int:
-        """Count the number of tokens in a text string."""
-        return len(self.encoding.encode(text))
+        """Count the number of tokens in a text string, reusing counts for repeated text."""
+        key = hashlib.blake2b(text.encode(), digest_size=16).digest()
+        count = _token_counts.get(key)
+        if count is not None:
+            _token_counts.move_to_end(key)
+            return count
+        
+        count = len(self.encoding.encode(text))
+        _token_counts[key] = count
+        if len(_token_counts) > _TOKEN_COUNT_CACHE_SIZE:
+            _token_counts.popitem(last=False)
+        return count
 
-    def _chunk_articles(self, articles: List[Dict], max_tokens: int) -> List[List[Dict]]:
+    def _chunk_articles(self, articles: List[Dict], max_tokens: int) -> List[List[Tuple[Dict, str]]]:
         """
-        Split articles into chunks that fit within the token limit.
+        Split articles into as few chunks as possible within the token limit.
+        
+        Articles are packed first-fit-decreasing by token count, so large articles
+        are placed first and smaller ones fill the remaining room.
         
         Args:
             articles: List of article dictionaries
             max_tokens: Maximum number of tokens per chunk
             
         Returns:
-            List of article chunks
+            List of article chunks, each a list of (article, formatted text) pairs
+            in their original order
         """
+        items = []
+        for article in articles:
+            article_text = _format_article(article)
+            # Estimate ~4 characters per token
+            items.append((len(article_text) >> 2, article, article_text))
+        
+        # Everything comfortably fits in one chunk; skip exact counting entirely
+        if sum(tokens for tokens, _, _ in items) <= max_tokens * 0.9:
+            return [[(article, text) for _, article, text in items]] if items else []
+        
+        # Pack largest articles first into the first chunk with room for them
+        items = [(self._count_tokens(text), index, article, text) for index, (_, article, text) in enumerate(items)]
+        items.sort(key=lambda item: item[0], reverse=True)
+        
         chunks = []
-        current_chunk = []
-        current_tokens = 0
+        chunk_tokens = []
+        for tokens, index, article, text in items:
+            for i, used in enumerate(chunk_tokens):
+                if used + tokens <= max_tokens:
+                    chunks[i].append((index, article, text))
+                    chunk_tokens[i] += tokens
+                    break
+            else:
+                # Oversized articles get a chunk of their own
+                chunks.append([(index, article, text)])
+                chunk_tokens.append(tokens)
         
-        for article in articles:
-            # Format article content
-            article_text = (
-                f"Title: {article.get('title', 'Untitled')}\n"
-                f"Source: {article.get('source', 'Unknown')}\n"
-                f"Date: {article.get('date', 'Unknown')}\n"
-                f"Content: {article.get('content', '')}\n"
-                f"Link: {article.get('link', '')}"
-            )
+        # Keep articles in their input order within each chunk
+        return [
+            [(article, text) for _, article, text in sorted(chunk, key=lambda item: item[0])]
+            for chunk in chunks
+        ]
+
+    def _build_chunk_prompts(self, contents: List[Dict]) -> List[List[str]]:
+        """
+        Trim articles to the prompt budget and build one prompt per token-limited chunk.
+        
+        Args:
+            contents: List of article content dictionaries
             
-            article_tokens = self._count_tokens(article_text)
+        Returns:
+            List of prompts, one for each chunk of articles
+        """
+        # Share the prompt budget fairly between articles
+        article_chars = min(self.max_article_chars, self.max_prompt_chars // len(contents))
+        trimmed_contents = [
+            {**article, 'content': self._truncate(article.get('content', ''), article_chars)}
+            for article in contents
+        ]
+        
+        # Split articles into chunks if needed
+        chunks = self._chunk_articles(trimmed_contents, self.max_tokens)
+        
+        if len(chunks) > 1:
+            logger.info(f"Articles split into {len(chunks)} chunks due to token limit")
+        
+        # Build one prompt per chunk
+        chunk_prompts = []
+        for i, chunk in enumerate(chunks, 1):
+            logger.info(f"Preparing chunk {i}/{len(chunks)} with {len(chunk)} articles")
             
-            # If adding this article would exceed the limit, start a new chunk
-            if current_tokens + article_tokens > max_tokens and current_chunk:
-                chunks.append(current_chunk)
-                current_chunk = []
-                current_tokens = 0
+            # Combine chunk content from the text formatted during chunking
+            combined_content = "\n\n---\n\n".join(text for _, text in chunk)
+            chunk_prompts.append(self._build_prompt(combined_content))
+        
+        return chunk_prompts
+
+    async def _summarize_chunks(self, chunk_prompts: List[List[str]]) -> List[str]:
+        """
+        Summarize all chunks concurrently; _generate bounds in-flight Gemini calls.
+        
+        Args:
+            chunk_prompts: Prompts built by _build_chunk_prompts
             
-            current_chunk.append(article)
-            current_tokens += article_tokens
+        Returns:
+            Summaries of the chunks that succeeded, in chunk order
+        """
+        responses = await asyncio.gather(
+            *[self._generate(prompt) for prompt in chunk_prompts],
+            return_exceptions=True
+        )
+        
+        chunk_summaries = []
+        for i, response in enumerate(responses, 1):
+            if isinstance(response, Exception):
+                logger.error(f"Error summarizing chunk {i}/{len(chunk_prompts)}: {str(response)}")
+                continue
+            if response.text:
+                chunk_summaries.append(response.text.strip())
+        return chunk_summaries
+
+    async def summarize_stream(self, contents: List[Dict]) -> AsyncIterator[str]:
+        """
+        Stream a single comprehensive summary for multiple articles as it is generated.
+        
+        When the articles span several chunks, the chunk summaries are generated
+        first and the final combining call is streamed.
+        
+        Args:
+            contents: List of article content dictionaries
+            
+        Yields:
+            Pieces of the summary text in generation order
+        """
+        if not contents:
+            logger.warning("No articles provided for summarization")
+            return
+        
+        logger.info(f"Starting streamed summarization for {len(contents)} articles")
+        chunk_prompts = self._build_chunk_prompts(contents)
         
-        # Add the last chunk if it's not empty
-        if current_chunk:
-            chunks.append(current_chunk)
+        if len(chunk_prompts) == 1:
+            prompt = chunk_prompts[0]
+        else:
+            chunk_summaries = await self._summarize_chunks(chunk_prompts)
+            if not chunk_summaries:
+                logger.error("No summaries generated for any chunks")
+                return
+            prompt = self._build_prompt("\n\n---\n\n".join(chunk_summaries))
         
-        return chunks
+        async with self._semaphore:
+            response = await self.model.generate_content_async(prompt, stream=True)
+            async for chunk in response:
+                if chunk.text:
+                    yield chunk.text
 
     async def summarize(self, content: Dict) -> Optional[Dict]:
         """
@@ -113,10 +337,10 @@ class Summarizer:
             logger.info(f"Generating summary for article: {content.get('title', 'Untitled')}")
             
             # Prepare the prompt
-            prompt = self.summary_prompt.format(content=content['content'])
+            prompt = self._build_prompt(content['content'])
             
             # Generate the summary
-            response = await asyncio.to_thread(self.model.generate_content, prompt)
+            response = await self._generate(prompt)
             
             if not response.text:
                 logger.error("No summary generated")
@@ -132,6 +356,72 @@ class Summarizer:
             logger.error(f"Error generating summary: {str(e)}")
             return None
 
+    async def summarize_many(self, contents: List[Dict], mode: Optional[str] = None) -> List[Optional[Dict]]:
+        """
+        Generate a separate summary for each of several articles.
+        
+        Args:
+            contents: List of article content dictionaries
+            mode: "batched" to send every article in one sectioned prompt, "parallel"
+                to issue one call per article; chosen by set size when omitted
+            
+        Returns:
+            List matching contents, each entry as returned by summarize
+        """
+        if mode is None:
+            mode = "batched" if len(contents) < self.batch_threshold else "parallel"
+        
+        if mode == "batched" and len(contents) > 1:
+            summaries = await self._summarize_sections(contents)
+            if summaries is not None:
+                return summaries
+            logger.warning("Batched summary did not return every section, falling back to per-article calls")
+        
+        return await asyncio.gather(*[self.summarize(content) for content in contents])
+
+    async def _summarize_sections(self, contents: List[Dict]) -> Optional[List[Optional[Dict]]]:
+        """
+        Summarize several articles with a single Gemini call.
+        
+        Args:
+            contents: List of article content dictionaries
+            
+        Returns:
+            List of summarized articles in input order, or None if the response
+            could not be split back into one section per article
+        """
+        try:
+            logger.info(f"Generating sectioned summary for {len(contents)} articles")
+            
+            # Split the shared prompt budget between the articles
+            article_chars = min(self.max_article_chars, self.max_prompt_chars // len(contents))
+            sections = "\n".join(
+                f"{_ARTICLE_DELIMITER.format(i)}\n{self._truncate(content.get('content') or '', article_chars)}"
+                for i, content in enumerate(contents, 1)
+            )
+            prompt = [self.summary_prompt, self.sections_prompt, f"Articles:\n{sections}"]
+            
+            response = await self._generate(prompt)
+            if not response.text:
+                return None
+            
+            section_texts = _split_sections(response.text)
+            
+            results = []
+            for i, content in enumerate(contents, 1):
+                if not content or not content.get('content'):
+                    results.append(None)
+                    continue
+                summary = section_texts.get(i)
+                if not summary:
+                    return None
+                results.append({**content, "summary": summary})
+            return results
+        
+        except Exception as e:
+            logger.error(f"Error generating sectioned summary: {str(e)}")
+            return None
+
     async def batch_summarize(self, contents: List[Dict]) -> Dict:
         """
         Generate a single comprehensive summary for multiple articles.
@@ -150,35 +440,35 @@ class Summarizer:
                     "articles": []
                 }
             
+            # Republished articles would otherwise be tokenized and billed twice
+            unique_contents = {}
+            for article in contents:
+                key = article.get('link') or hashlib.blake2b(
+                    article.get('content', '').encode(), digest_size=8
+                ).hexdigest()
+                unique_contents.setdefault(key, article)
+            if len(unique_contents) < len(contents):
+                logger.info(f"Dropped {len(contents) - len(unique_contents)} duplicate articles")
+                contents = list(unique_contents.values())
+            
+            # Reuse the summary if this exact article set was summarized recently;
+            # the dedup keys fall back to a content digest for articles without links
+            cache_key = hashlib.blake2b(
+                b"||".join(sorted(key.encode() for key in unique_contents))
+            ).hexdigest()
+            cached_summary = self._summary_cache.get(cache_key)
+            if cached_summary is not None:
+                logger.info(f"Using cached summary for {len(contents)} articles")
+                return {
+                    "summary": cached_summary,
+                    "articles": contents,
+                    "chunks_processed": 0
+                }
+            
             logger.info(f"Starting batch summarization for {len(contents)} articles")
             
-            # Split articles into chunks if needed
-            chunks = self._chunk_articles(contents, self.max_tokens)
-            
-            if len(chunks) > 1:
-                logger.info(f"Articles split into {len(chunks)} chunks due to token limit")
-            
-            # Process each chunk and combine summaries
-            chunk_summaries = []
-            for i, chunk in enumerate(chunks, 1):
-                logger.info(f"Processing chunk {i}/{len(chunks)} with {len(chunk)} articles")
-                
-                # Combine chunk content
-                combined_content = "\n\n---\n\n".join([
-                    f"Title: {article.get('title', 'Untitled')}\n"
-                    f"Source: {article.get('source', 'Unknown')}\n"
-                    f"Date: {article.get('date', 'Unknown')}\n"
-                    f"Content: {article.get('content', '')}\n"
-                    f"Link: {article.get('link', '')}"
-                    for article in chunk
-                ])
-                
-                # Generate summary for this chunk
-                summary_prompt = self.summary_prompt.format(content=combined_content)
-                response = await asyncio.to_thread(self.model.generate_content, summary_prompt)
-                
-                if response.text:
-                    chunk_summaries.append(response.text.strip())
+            chunk_prompts = self._build_chunk_prompts(contents)
+            chunk_summaries = await self._summarize_chunks(chunk_prompts)
             
             if not chunk_summaries:
                 logger.error("No summaries generated for any chunks")
@@ -187,23 +477,27 @@ class Summarizer:
                     "articles": contents
                 }
             
+            # Only cache summaries that cover every chunk
+            cacheable = len(chunk_summaries) == len(chunk_prompts)
+            
             # If we have multiple chunks, combine their summaries
             if len(chunk_summaries) > 1:
                 logger.info("Combining summaries from multiple chunks")
-                final_prompt = self.summary_prompt.format(
-                    content="\n\n---\n\n".join(chunk_summaries)
-                )
-                final_response = await asyncio.to_thread(self.model.generate_content, final_prompt)
+                final_prompt = self._build_prompt("\n\n---\n\n".join(chunk_summaries))
+                final_response = await self._generate(final_prompt)
+                cacheable = cacheable and bool(final_response.text)
                 final_summary = final_response.text.strip() if final_response.text else "Failed to combine summaries"
             else:
                 final_summary = chunk_summaries[0]
             
             logger.info("Successfully generated comprehensive summary")
+            if cacheable:
+                self._summary_cache[cache_key] = final_summary
             
             return {
                 "summary": final_summary,
                 "articles": contents,
-                "chunks_processed": len(chunks)
+                "chunks_processed": len(chunk_prompts)
             }
             
         except Exception as e:
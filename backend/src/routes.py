@@ -1,13 +1,20 @@
-from quart import Blueprint, request, jsonify
-from .config.firebase import db
+from quart import Blueprint, Response, current_app, request, jsonify
+import asyncio
+import hashlib
+import hmac
+import time
+from functools import lru_cache
+from .config.firebase import async_db
 import os
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from google.cloud import firestore
-import traceback
 from .utils.firebase import get_active_topics
+from .utils.cache import recent_articles_cache, topics_response_cache, topics_response_lock, invalidate_article_caches
+from .utils.article_args import parse_article_args, encode_cursor
 import logging
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Tuple
 from firebase_admin import firestore
+from google.cloud.firestore_v1.base_query import And, FieldFilter
 from .news_processor.news_fetcher import NewsFetcher
 from .news_processor.content_extractor import ContentExtractor
 from .news_processor.processor import Processor
@@ -18,25 +25,226 @@ logger = logging.getLogger(__name__)
 
 main_bp = Blueprint('main', __name__)
 
+# Accepted email domains, matched exactly against the part after the last '@'
+ALLOWED_DOMAINS = frozenset({'gmail.com', 'yahoo.com', 'outlook.com'})
+
+# Settings read once at import; the .env file is loaded by config.firebase above
+MAX_USERS = int(os.getenv('MAX_USERS', '5'))
+ADMIN_PWD = os.getenv('ADMIN_PWD')
+
+# Admin password kept only as a keyed digest so checks compare fixed-size values in constant time
+_ADMIN_KEY = os.urandom(32)
+_ADMIN_HASH = hashlib.blake2b(ADMIN_PWD.encode(), key=_ADMIN_KEY).digest() if ADMIN_PWD else None
+
+# Collection references are immutable, so handlers share them
+_users_ref = async_db.collection('users')
+_articles_ref = async_db.collection('processed_articles')
+
+# Running subscriber total, so the MAX_USERS check reads one document
+_user_counter_ref = async_db.collection('counters').document('users')
+# Last known subscriber total and when it stops being trusted, letting bursts of
+# signups be turned away without a Firestore read once the limit is reached
+_USER_COUNT_TTL = 30
+_user_count_memo: Tuple[int, float] = (0, 0.0)
+
+# Window covered by /articles/recent
+_RECENT_WINDOW = timedelta(days=7)
+
+# Fields returned by the article endpoints unless the caller asks for others
+ARTICLE_FIELDS = ('title', 'link', 'url', 'source', 'date', 'snippet', 'thumbnail', 'summary', 'topic', 'processed_at')
+# Heavy fields only sent when requested through the fields parameter
+OPTIONAL_ARTICLE_FIELDS = ('content',)
+
+# Colours of the status marks on the unsubscribe-email result pages
+_RESULT_PAGE_COLOURS = {'success': '#28a745', 'error': '#dc3545'}
+_HTML_HEADERS = {'Content-Type': 'text/html; charset=utf-8'}
+
+def _render_result_page(title: str, kind: str, mark: str, message: str) -> bytes:
+    """Render one of the static unsubscribe-email result pages as UTF-8 bytes."""
+    return f"""
+            <!DOCTYPE html>
+            <html>
+            <head>
+                <title>{title}</title>
+                <style>
+                    body {{ font-family: Arial, sans-serif; text-align: center; padding: 50px; }}
+                    .{kind} {{ color: {_RESULT_PAGE_COLOURS[kind]}; font-size: 24px; margin-bottom: 20px; }}
+                    .message {{ color: #333; font-size: 16px; }}
+                </style>
+            </head>
+            <body>
+                <div class="{kind}">{mark}</div>
+                <div class="message">{message}</div>
+            </body>
+            </html>
+            """.encode()
+
+# The pages never change, so they are encoded once and shared by every request
+_HTML_NO_EMAIL = _render_result_page('Error', 'error', '✕', 'Email parameter is required for unsubscription.')
+_HTML_NOT_FOUND = _render_result_page('Error', 'error', '✕', 'No subscription found for this email address.')
+_HTML_UNSUBSCRIBED = _render_result_page(
+    'Unsubscribe Successful', 'success', '✓',
+    'You have been successfully unsubscribed from our newsletter.'
+)
+_HTML_DB_ERROR = _render_result_page(
+    'Error', 'error', '✕',
+    'An error occurred while processing your request. Please try again later.'
+)
+_HTML_ERROR = _render_result_page('Error', 'error', '✕', 'An unexpected error occurred. Please try again later.')
+
+def _requested_article_fields() -> List[str]:
+    """Return the document fields to fetch, from the optional comma-separated fields parameter."""
+    fields = request.args.get('fields')
+    if not fields:
+        return list(ARTICLE_FIELDS)
+    allowed = set(ARTICLE_FIELDS) | set(OPTIONAL_ARTICLE_FIELDS)
+    requested = [field.strip() for field in fields.split(',') if field.strip() in allowed]
+    return requested or list(ARTICLE_FIELDS)
+
+def _is_admin_password(password: Any) -> bool:
+    """Check a supplied password against ADMIN_PWD without leaking timing information."""
+    if _ADMIN_HASH is None or not isinstance(password, str):
+        return False
+    digest = hashlib.blake2b(password.encode(), key=_ADMIN_KEY).digest()
+    return hmac.compare_digest(digest, _ADMIN_HASH)
+
+@lru_cache(maxsize=None)
+def _get_pipeline() -> Tuple[NewsFetcher, ContentExtractor, Summarizer, EmailService]:
+    """
+    Build the news pipeline components on first use and share them across requests.
+    
+    Construction is deferred so a missing API key fails the admin request rather
+    than the import, and the HTTP session binds to the running event loop.
+    """
+    return NewsFetcher(), ContentExtractor(), Summarizer(), EmailService()
+
+async def _extract_links(content_extractor: ContentExtractor, links: List[str]) -> List[Any]:
+    """
+    Extract content for every link, fetching each distinct URL only once.
+    
+    Args:
+        content_extractor: Extractor used for the fetches
+        links: Article links, possibly with repeats
+        
+    Returns:
+        List matching links with the extracted content, None, or the raised exception
+    """
+    unique_links = list(dict.fromkeys(links))
+    results = await asyncio.gather(
+        *[content_extractor.extract_content(link) for link in unique_links],
+        return_exceptions=True
+    )
+    by_link = dict(zip(unique_links, results))
+    return [by_link[link] for link in links]
+
 @main_bp.route('/topics', methods=['GET'])
-def get_topics():
+async def get_topics():
     """Get all active topics from the database."""
     try:
-        logger.info("Fetching active topics")
-        topics = get_active_topics()
-        logger.info(f"Found {len(topics)} active topics")
-        
-        return jsonify({
-            'topics': topics
-        }), 200
+        # Serve the pre-encoded body while it is fresh
+        body = topics_response_cache.get('topics')
+        if body is not None:
+            return Response(body, mimetype='application/json'), 200
+        
+        async with topics_response_lock:
+            body = topics_response_cache.get('topics')
+            if body is None:
+                logger.info("Fetching active topics")
+                topics = await asyncio.to_thread(get_active_topics)
+                logger.info(f"Found {len(topics)} active topics")
+                
+                body = current_app.json.dumps_bytes({
+                    'topics': topics
+                })
+                # Empty results are not cached, as get_active_topics also returns [] on errors
+                if topics:
+                    topics_response_cache['topics'] = body
+        return Response(body, mimetype='application/json'), 200
     except Exception as e:
-        logger.error(f"Error fetching topics: {str(e)}")
-        logger.error(f"Traceback: {traceback.format_exc()}")
+        logger.exception("Error fetching topics")
         return jsonify({
             'error': 'Failed to fetch topics',
             'message': str(e)
         }), 500
 
+def _remember_user_count(count: int):
+    """Memoize the subscriber total for _USER_COUNT_TTL seconds."""
+    global _user_count_memo
+    _user_count_memo = (count, time.monotonic() + _USER_COUNT_TTL)
+
+@firestore.async_transactional
+async def _add_user(transaction, user_data: Dict[str, Any]) -> Tuple[str, int]:
+    """
+    Add a subscriber unless the email is taken or the user limit is reached.
+    
+    The duplicate check, the count and the insert run in one transaction, so
+    concurrent signups cannot both pass the checks and over-admit past MAX_USERS.
+    
+    Args:
+        transaction: Transaction supplied by the async_transactional decorator
+        user_data: Document to create
+        
+    Returns:
+        Tuple of 'exists', 'full' or 'added' and the subscriber total afterwards
+    """
+    # Indexed lookup returns at most one matching document
+    existing_users = await _users_ref.where(
+        filter=FieldFilter('email', '==', user_data['email'])
+    ).limit(1).get(transaction=transaction)
+    if existing_users:
+        return 'exists', -1
+    
+    # Read the running total; count the collection once to seed it if missing
+    counter = await _user_counter_ref.get(transaction=transaction)
+    if counter.exists:
+        total_users = counter.get('count')
+    else:
+        total_users = (await _users_ref.count().get(transaction=transaction))[0][0].value
+    logger.debug("Current total users: %s, Max allowed: %s", total_users, MAX_USERS)
+    if total_users >= MAX_USERS:
+        return 'full', total_users
+    
+    transaction.create(_users_ref.document(), user_data)
+    transaction.set(
+        _user_counter_ref,
+        {'count': firestore.Increment(1) if counter.exists else total_users + 1},
+        merge=True
+    )
+    return 'added', total_users + 1
+
+@firestore.async_transactional
+async def _remove_users(transaction, refs: List[Any]) -> int:
+    """
+    Delete subscriber documents and decrement the running total atomically.
+    
+    The documents and the counter are read inside the transaction, so the
+    decrement matches what was actually deleted even when unsubscribes race
+    each other or the counter being seeded by _add_user.
+    
+    Args:
+        transaction: Transaction supplied by the async_transactional decorator
+        refs: References of the subscriber documents to delete
+        
+    Returns:
+        Number of documents deleted
+    """
+    existing = [ref for ref in refs if (await ref.get(transaction=transaction)).exists]
+    counter = await _user_counter_ref.get(transaction=transaction)
+    
+    for ref in existing:
+        transaction.delete(ref)
+    # A missing counter is seeded from a fresh count by the next signup
+    if existing and counter.exists:
+        transaction.update(_user_counter_ref, {'count': firestore.Increment(-len(existing))})
+    return len(existing)
+
+async def _delete_users(docs: List[Any]):
+    """Delete subscriber documents and decrement the running total in one transaction."""
+    await _remove_users(async_db.transaction(), [doc.reference for doc in docs])
+    
+    global _user_count_memo
+    _user_count_memo = (0, 0.0)
+
 @main_bp.route('/subscribe', methods=['POST'])
 async def subscribe():
     try:
@@ -48,73 +256,53 @@ async def subscribe():
         name = data.get('name', '').strip()
         topic = data.get('topic', '').strip()
         
-        print(f"\n=== New Subscription Request ===")
-        print(f"Email: {email}")
-        print(f"Name: {name}")
-        print(f"Topic: {topic}")
-        print(f"Raw data: {data}")
+        logger.debug("New subscription request: email=%s name=%s topic=%s", email, name, topic)
         
         if not all([email, name, topic]):
             return {'error': 'Please fill in all required fields'}, 400
         
-        # Validate email domain
-        allowed_domains = ['gmail.com', 'yahoo.com', 'outlook.com']
-        if not any(email.endswith(domain) for domain in allowed_domains):
+        # Validate email domain; a bare "gmail.com" has no local part and no '@'
+        local_part, at, domain = email.rpartition('@')
+        if not (local_part and at) or domain not in ALLOWED_DOMAINS:
             return {'error': 'Please use a Gmail, Yahoo, or Outlook email address'}, 400
         
-        # Check if user already exists
-        users_ref = db.collection('users')
+        # Turn signups away without touching Firestore while the limit is known to be reached
+        known_count, known_until = _user_count_memo
+        if known_count >= MAX_USERS and known_until > time.monotonic():
+            return {
+                'error': 'Maximum user limit reached',
+                'message': 'Apologies for the inconvenience, this is a research project and we have reached maximum user limit due to cost constraints! Please try again later. Please reach out to me directly if interested in supporting me at deep@currently.com!'
+            }, 403
+        
         try:
-            # Get all users first to verify the collection
-            all_users = users_ref.get()
-            print(f"\n=== Current Database State ===")
-            print(f"Total users in database: {len(all_users)}")
-            print("Existing users:")
+            # Add new user; the server stamps createdAt when the write commits
+            user_data = {
+                'email': email,
+                'name': name,
+                'topic': topic,
+                'createdAt': firestore.SERVER_TIMESTAMP,
+                'status': 'active'
+            }
             
-            # Check for duplicate email
-            duplicate_found = False
-            for user in all_users:
-                user_data = user.to_dict()
-                print(f"- Email: {user_data['email']}")
-                if user_data['email'] == email:
-                    print(f"  MATCH FOUND! This email already exists in the database.")
-                    duplicate_found = True
-                    break
-                print(f"  Name: {user_data['name']}")
-                print(f"  Topic: {user_data.get('topic', 'N/A')}")
+            outcome, total_users = await _add_user(async_db.transaction(), user_data)
+            if outcome != 'exists':
+                _remember_user_count(total_users)
             
-            if duplicate_found:
-                print(f"\n=== Duplicate Found ===")
-                print(f"Found existing user with email: {email}")
+            if outcome == 'exists':
+                logger.debug("Found existing user with email: %s", email)
                 return {
                     'error': 'You are already subscribed',
                     'message': 'This email address is already registered. If you want to change your subscription, please unsubscribe first.',
                     'show_unsubscribe': True
                 }, 409
             
-            # Check user limit
-            total_users = len(all_users)
-            print(f"\n=== User Limit Check ===")
-            print(f"Current total users: {total_users}, Max allowed: {int(os.getenv('MAX_USERS', 5))}")
-            if total_users >= int(os.getenv('MAX_USERS', 5)):
+            if outcome == 'full':
                 return {
                     'error': 'Maximum user limit reached',
                     'message': 'Apologies for the inconvenience, this is a research project and we have reached maximum user limit due to cost constraints! Please try again later. Please reach out to me directly if interested in supporting me at deep@currently.com!'
                 }, 403
             
-            # Add new user
-            user_data = {
-                'email': email,
-                'name': name,
-                'topic': topic,
-                'createdAt': datetime.utcnow(),
-                'status': 'active'
-            }
-            
-            print(f"\n=== Adding New User ===")
-            print(f"User data to be added: {user_data}")
-            users_ref.add(user_data)
-            print(f"Successfully added new user")
+            logger.info("Added new subscriber for topic: %s", topic)
             
             return {
                 'message': 'You are successfully subscribed! You will receive weekly emails starting this Sunday.',
@@ -122,10 +310,7 @@ async def subscribe():
             }, 201
             
         except Exception as db_error:
-            print(f"\n=== Database Error ===")
-            print(f"Error type: {type(db_error)}")
-            print(f"Error message: {str(db_error)}")
-            print(f"Traceback: {traceback.format_exc()}")
+            logger.exception("Database error during subscription")
             return {
                 'error': 'Database operation failed',
                 'message': 'An error occurred while accessing the database. Please try again later.',
@@ -133,10 +318,7 @@ async def subscribe():
             }, 500
     
     except Exception as e:
-        print(f"\n=== Error Occurred ===")
-        print(f"Error type: {type(e)}")
-        print(f"Error message: {str(e)}")
-        print(f"Traceback: {traceback.format_exc()}")
+        logger.exception("Subscription failed")
         return {
             'error': 'Subscription failed',
             'message': 'An unexpected error occurred. Please try again later.',
@@ -152,46 +334,35 @@ async def unsubscribe():
             
         email = data.get('email', '').strip().lower()  # Normalize email
         
-        print(f"\n=== Unsubscribe Request ===")
-        print(f"Email: {email}")
-        print(f"Raw data: {data}")
+        logger.debug("Unsubscribe request: email=%s", email)
         
         if not email:
             return {'error': 'Email is required'}, 400
         
         # Find and delete user
-        users_ref = db.collection('users')
+        users_ref = _users_ref
         try:
             # Use the recommended filter syntax
-            query = users_ref.where(filter=firestore.FieldFilter('email', '==', email))
-            query_result = query.get()
-            print(f"Query result length: {len(query_result)}")
+            query = users_ref.where(filter=FieldFilter('email', '==', email))
+            query_result = await query.get()
             
             if len(query_result) == 0:
-                print(f"\n=== No User Found ===")
-                print(f"No user found with email: {email}")
+                logger.debug("No user found with email: %s", email)
                 return {
                     'error': 'User not found',
                     'message': 'No subscription found for this email address.'
                 }, 404
             
-            # Delete the subscription
-            for doc in query_result:
-                print(f"\n=== Deleting Subscription ===")
-                print(f"Deleting subscription for email: {email}")
-                doc.reference.delete()
+            # Delete every matching subscription in a single commit
+            await _delete_users(query_result)
             
-            print(f"\n=== Success ===")
-            print(f"Successfully unsubscribed user: {email}")
+            logger.info("Removed %d subscription(s)", len(query_result))
             return {
                 'message': 'Successfully unsubscribed from the newsletter.'
             }, 200
                 
         except Exception as db_error:
-            print(f"\n=== Database Error ===")
-            print(f"Error type: {type(db_error)}")
-            print(f"Error message: {str(db_error)}")
-            print(f"Traceback: {traceback.format_exc()}")
+            logger.exception("Database error during unsubscribe")
             return {
                 'error': 'Database operation failed',
                 'message': 'An error occurred while accessing the database. Please try again later.',
@@ -199,10 +370,7 @@ async def unsubscribe():
             }, 500
     
     except Exception as e:
-        print(f"\n=== Error Occurred ===")
-        print(f"Error type: {type(e)}")
-        print(f"Error message: {str(e)}")
-        print(f"Traceback: {traceback.format_exc()}")
+        logger.exception("Unsubscribe failed")
         return {
             'error': 'Unsubscribe failed',
             'message': 'An unexpected error occurred. Please try again later.',
@@ -221,17 +389,14 @@ async def test_email():
             return jsonify({'error': 'Password is required'}), 400
         
         # Validate admin password
-        if password != os.getenv('ADMIN_PWD'):
+        if not _is_admin_password(password):
             logger.warning("Invalid admin password provided")
             return jsonify({'error': 'Invalid password'}), 401
         
         logger.info("Admin authentication successful, proceeding with test operations")
         
-        # Initialize components
-        news_fetcher = NewsFetcher()
-        content_extractor = ContentExtractor()
-        summarizer = Summarizer()
-        email_service = EmailService()
+        # Shared pipeline components
+        news_fetcher, content_extractor, summarizer, email_service = _get_pipeline()
         
         # Step 1: Fetch news articles
         logger.info("Starting news fetch for 'Artificial Intelligence News'")
@@ -249,27 +414,23 @@ async def test_email():
         
         # Step 2: Extract content from articles
         logger.info("Starting content extraction for fetched articles")
-        processed_articles = []
+        # Fetch concurrently; the extractor's semaphore bounds in-flight requests
+        contents = await _extract_links(content_extractor, [article['link'] for article in articles])
         
-        for i, article in enumerate(articles, 1):
-            try:
-                logger.info(f"Extracting content for article {i}/{len(articles)}: {article['title']}")
-                content = await content_extractor.extract_content(article['link'])
-                
-                if content:
-                    processed_article = {
-                        **article,
-                        **content
-                    }
-                    processed_articles.append(processed_article)
-                    logger.info(f"Successfully extracted content for article {i}")
-                else:
-                    logger.warning(f"Failed to extract content for article {i}")
-                    
-            except Exception as e:
-                logger.error(f"Error processing article {i}: {str(e)}")
+        processed_articles = []
+        for i, (article, content) in enumerate(zip(articles, contents), 1):
+            if isinstance(content, Exception):
+                logger.error(f"Error processing article {i}: {str(content)}")
                 logger.debug(f"Article details: {article}")
                 continue
+            
+            if content:
+                processed_articles.append({
+                    **article,
+                    **content
+                })
+            else:
+                logger.warning(f"Failed to extract content for article {i}")
         
         logger.info(f"Content extraction completed. Successfully processed {len(processed_articles)} articles")
         
@@ -317,106 +478,227 @@ async def test_email():
         }), 200
     
     except Exception as e:
-        logger.error(f"Error in test endpoint: {str(e)}")
-        logger.error(f"Traceback: {traceback.format_exc()}")
+        logger.exception("Error in test endpoint")
         return jsonify({
             'status': 'error',
             'message': str(e)
         }), 500
 
-@main_bp.route('/articles', methods=['GET'])
-async def get_articles():
-    """Get all processed articles with optional filtering."""
+def _sse_event(text: str) -> str:
+    """Format text as a server-sent event, one data line per text line."""
+    return "".join(f"data: {line}\n" for line in text.split("\n")) + "\n"
+
+@main_bp.route('/test/stream', methods=['POST'])
+async def test_stream():
+    """Admin endpoint that streams the test summary as server-sent events while Gemini generates it."""
     try:
-        # Get query parameters
-        topic = request.args.get('topic')
-        start_date = request.args.get('start_date')
-        end_date = request.args.get('end_date')
-        limit = int(request.args.get('limit', 10))
+        data = await request.get_json()
+        password = data.get('password')
         
-        # Initialize Firestore
-        db = firestore.client()
-        articles_ref = db.collection('processed_articles')
+        if not password:
+            logger.warning("Stream test request received without password")
+            return jsonify({'error': 'Password is required'}), 400
         
-        # Build query
-        query = articles_ref
+        # Validate admin password
+        if not _is_admin_password(password):
+            logger.warning("Invalid admin password provided")
+            return jsonify({'error': 'Invalid password'}), 401
         
+        news_fetcher, content_extractor, summarizer, _ = _get_pipeline()
+        
+        articles = await news_fetcher.search_news("Artificial Intelligence News", "week")
+        contents = await _extract_links(content_extractor, [article['link'] for article in articles])
+        processed_articles = [
+            {**article, **content}
+            for article, content in zip(articles, contents)
+            if content and not isinstance(content, Exception)
+        ]
+        
+        if not processed_articles:
+            return jsonify({
+                'status': 'success',
+                'message': 'No articles found',
+                'articles': []
+            }), 200
+        
+        async def events():
+            async for text in summarizer.summarize_stream(processed_articles):
+                yield _sse_event(text)
+            yield "event: done\ndata: \n\n"
+        
+        response = Response(events(), mimetype='text/event-stream')
+        response.headers['Cache-Control'] = 'no-cache'
+        return response
+    
+    except Exception as e:
+        logger.exception("Error in stream test endpoint")
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 500
+
+@main_bp.route('/articles', methods=['GET'])
+async def get_articles():
+    """Get processed articles with optional filtering; article bodies are left out unless fields asks for them."""
+    try:
+        # Get query parameters
+        params, error = parse_article_args(request.args)
+        if error:
+            return jsonify({'error': error}), 400
+        topic = params['topic']
+        start_date = params['start_date']
+        end_date = params['end_date']
+        limit = params['limit']
+        cursor = params['cursor']
+        
+        articles_ref = _articles_ref
+        
+        # Build every condition into one composite filter
+        filters = []
         if topic:
-            query = query.where('topic', '==', topic)
-            
+            filters.append(FieldFilter('topic', '==', topic))
         if start_date:
-            try:
-                start_dt = datetime.fromisoformat(start_date)
-                query = query.where('processed_at', '>=', start_dt.isoformat())
-            except ValueError:
-                return jsonify({'error': 'Invalid start_date format. Use ISO format (YYYY-MM-DD)'}), 400
-                
+            filters.append(FieldFilter('processed_at', '>=', start_date))
         if end_date:
-            try:
-                end_dt = datetime.fromisoformat(end_date)
-                query = query.where('processed_at', '<=', end_dt.isoformat())
-            except ValueError:
-                return jsonify({'error': 'Invalid end_date format. Use ISO format (YYYY-MM-DD)'}), 400
-        
-        # Execute query
-        articles = await query.order_by('processed_at', direction=firestore.Query.DESCENDING).limit(limit).get()
-        
-        # Format results
-        results = []
-        for article in articles:
-            article_data = article.to_dict()
-            article_data['id'] = article.id
-            results.append(article_data)
-            
-        return jsonify({
-            'count': len(results),
-            'articles': results
-        }), 200
+            filters.append(FieldFilter('processed_at', '<=', end_date))
+        
+        query = articles_ref
+        if len(filters) > 1:
+            query = query.where(filter=And(filters))
+        elif filters:
+            query = query.where(filter=filters[0])
+        
+        # processed_at is always fetched because the next cursor is built from it
+        fields = _requested_article_fields()
+        if 'processed_at' not in fields:
+            fields.append('processed_at')
+        
+        # Order by document id as a tiebreaker so cursors are stable
+        query = (
+            query.select(fields)
+            .order_by('processed_at', direction=firestore.Query.DESCENDING)
+            .order_by('__name__', direction=firestore.Query.DESCENDING)
+        )
+        if cursor:
+            # Seek directly past the previous page instead of re-reading it
+            processed_at, doc_id = cursor
+            query = query.start_after({'processed_at': processed_at, '__name__': doc_id})
+        query = query.limit(limit)
+        
+        # Pull the first document before any headers go out, so a missing index,
+        # bad cursor or permission error still ends up in the 500 handler below
+        documents = query.stream().__aiter__()
+        first = await anext(documents, None)
+        
+        return Response(
+            _stream_articles(documents, first, limit, current_app.json.dumps),
+            mimetype='application/json'
+        ), 200
         
     except Exception as e:
         logger.error(f"Error fetching articles: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
+async def _stream_articles(documents, first, limit: int, dumps):
+    """
+    Yield a query's documents as a JSON body, one article at a time.
+    
+    Each document is serialized as soon as Firestore returns it, so the full
+    result list is never held in memory. The body has the same shape as a
+    jsonify'd response: {"articles": [...], "count": n, "next_cursor": c}, where
+    next_cursor is null once the last page has been returned. The caller has
+    already pulled the first document (None for an empty result) so that query
+    errors surface before the response starts. dumps is taken from the app
+    while the request context is still active.
+    """
+    async def articles():
+        if first is None:
+            return
+        yield first
+        async for article in documents:
+            yield article
+    
+    count = 0
+    last = None
+    try:
+        yield '{"articles":['
+        async for article in articles():
+            article_data = article.to_dict()
+            article_data['id'] = article.id
+            yield (',' if count else '') + dumps(article_data)
+            count += 1
+            last = (article_data.get('processed_at'), article.id)
+        
+        next_cursor = None
+        if count == limit and last and isinstance(last[0], datetime):
+            next_cursor = encode_cursor(*last)
+        yield f'],"count":{count},"next_cursor":{dumps(next_cursor)}}}'
+    except Exception as e:
+        # Headers are already sent, so the failure can only be logged
+        logger.error(f"Error streaming articles: {str(e)}")
+        raise
+
 @main_bp.route('/articles/recent', methods=['GET'])
 async def get_recent_articles():
     """Get recent articles (last 7 days) with optional topic filter."""
     try:
-        topic = request.args.get('topic')
-        limit = int(request.args.get('limit', 10))
+        params, error = parse_article_args(request.args)
+        if error:
+            return jsonify({'error': error}), 400
+        topic = params['topic']
+        limit = params['limit']
+        fields = _requested_article_fields()
+        
+        # Serve the encoded body when the same view was built recently
+        cache_key = (topic or '*', limit, tuple(fields))
+        body = recent_articles_cache.get(cache_key)
+        if body is not None:
+            return Response(body, mimetype='application/json'), 200
         
         # Calculate date range
-        end_date = datetime.utcnow()
-        start_date = end_date - timedelta(days=7)
+        end_date = datetime.now(timezone.utc)
+        start_date = end_date - _RECENT_WINDOW
         
-        # Initialize Firestore
-        db = firestore.client()
-        articles_ref = db.collection('processed_articles')
+        articles_ref = _articles_ref
         
         # Build query
-        query = articles_ref.where('processed_at', '>=', start_date.isoformat())
+        query = articles_ref.where('processed_at', '>=', start_date)
         
         if topic:
             query = query.where('topic', '==', topic)
             
-        # Execute query
-        articles = await query.order_by('processed_at', direction=firestore.Query.DESCENDING).limit(limit).get()
+        # Execute query, formatting each document as it arrives instead of
+        # holding every snapshot first
+        articles = (
+            query.select(fields)
+            .order_by('processed_at', direction=firestore.Query.DESCENDING)
+            .limit(limit)
+            .stream()
+        )
+        results = [{**article.to_dict(), 'id': article.id} async for article in articles]
         
-        # Format results
-        results = []
-        for article in articles:
-            article_data = article.to_dict()
-            article_data['id'] = article.id
-            results.append(article_data)
-            
-        return jsonify({
+        body = current_app.json.dumps_bytes({
             'count': len(results),
             'articles': results
-        }), 200
+        })
+        recent_articles_cache[cache_key] = body
+        return Response(body, mimetype='application/json'), 200
         
     except Exception as e:
         logger.error(f"Error fetching recent articles: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
+@main_bp.route('/cache/invalidate', methods=['POST'])
+async def invalidate_cache():
+    """Admin endpoint that drops cached article responses after articles are written elsewhere."""
+    data = await request.get_json(silent=True) or {}
+    if not _is_admin_password(data.get('password')):
+        logger.warning("Invalid admin password provided for cache invalidation")
+        return jsonify({'error': 'Invalid password'}), 401
+    
+    invalidate_article_caches()
+    return jsonify({'status': 'success'}), 200
+
 @main_bp.route('/unsubscribe-email', methods=['GET'])
 async def unsubscribe_email():
     """Handle user unsubscription via direct email link."""
@@ -424,127 +706,34 @@ async def unsubscribe_email():
         # Get email from query parameters
         email = request.args.get('email')
         if not email:
-            return """
-            <!DOCTYPE html>
-            <html>
-            <head>
-                <title>Error</title>
-                <style>
-                    body { font-family: Arial, sans-serif; text-align: center; padding: 50px; }
-                    .error { color: #dc3545; font-size: 24px; margin-bottom: 20px; }
-                    .message { color: #333; font-size: 16px; }
-                </style>
-            </head>
-            <body>
-                <div class="error">✕</div>
-                <div class="message">Email parameter is required for unsubscription.</div>
-            </body>
-            </html>
-            """
+            return _HTML_NO_EMAIL, 200, _HTML_HEADERS
         
         # Normalize email
         email = email.strip().lower()
         
-        print(f"\n=== Unsubscribe Request (Email Link) ===")
-        print(f"Email: {email}")
+        logger.debug("Unsubscribe request (email link): email=%s", email)
         
         # Find and delete user
-        users_ref = db.collection('users')
+        users_ref = _users_ref
         try:
             # Use the recommended filter syntax
-            query = users_ref.where(filter=firestore.FieldFilter('email', '==', email))
-            query_result = query.get()
-            print(f"Query result length: {len(query_result)}")
+            query = users_ref.where(filter=FieldFilter('email', '==', email))
+            query_result = await query.get()
             
             if len(query_result) == 0:
-                print(f"\n=== No User Found ===")
-                print(f"No user found with email: {email}")
-                return """
-                <!DOCTYPE html>
-                <html>
-                <head>
-                    <title>Error</title>
-                    <style>
-                        body { font-family: Arial, sans-serif; text-align: center; padding: 50px; }
-                        .error { color: #dc3545; font-size: 24px; margin-bottom: 20px; }
-                        .message { color: #333; font-size: 16px; }
-                    </style>
-                </head>
-                <body>
-                    <div class="error">✕</div>
-                    <div class="message">No subscription found for this email address.</div>
-                </body>
-                </html>
-                """
+                logger.debug("No user found with email: %s", email)
+                return _HTML_NOT_FOUND, 200, _HTML_HEADERS
             
             # Delete the subscription
-            for doc in query_result:
-                print(f"\n=== Deleting Subscription ===")
-                print(f"Deleting subscription for email: {email}")
-                doc.reference.delete()
+            await _delete_users(query_result)
             
-            print(f"\n=== Success ===")
-            print(f"Successfully unsubscribed user: {email}")
-            return """
-            <!DOCTYPE html>
-            <html>
-            <head>
-                <title>Unsubscribe Successful</title>
-                <style>
-                    body { font-family: Arial, sans-serif; text-align: center; padding: 50px; }
-                    .success { color: #28a745; font-size: 24px; margin-bottom: 20px; }
-                    .message { color: #333; font-size: 16px; }
-                </style>
-            </head>
-            <body>
-                <div class="success">✓</div>
-                <div class="message">You have been successfully unsubscribed from our newsletter.</div>
-            </body>
-            </html>
-            """
+            logger.info("Removed %d subscription(s) via email link", len(query_result))
+            return _HTML_UNSUBSCRIBED, 200, _HTML_HEADERS
                 
-        except Exception as db_error:
-            print(f"\n=== Database Error ===")
-            print(f"Error type: {type(db_error)}")
-            print(f"Error message: {str(db_error)}")
-            print(f"Traceback: {traceback.format_exc()}")
-            return """
-            <!DOCTYPE html>
-            <html>
-            <head>
-                <title>Error</title>
-                <style>
-                    body { font-family: Arial, sans-serif; text-align: center; padding: 50px; }
-                    .error { color: #dc3545; font-size: 24px; margin-bottom: 20px; }
-                    .message { color: #333; font-size: 16px; }
-                </style>
-            </head>
-            <body>
-                <div class="error">✕</div>
-                <div class="message">An error occurred while processing your request. Please try again later.</div>
-            </body>
-            </html>
-            """
+        except Exception:
+            logger.exception("Database error during email-link unsubscribe")
+            return _HTML_DB_ERROR, 200, _HTML_HEADERS
     
-    except Exception as e:
-        print(f"\n=== Error Occurred ===")
-        print(f"Error type: {type(e)}")
-        print(f"Error message: {str(e)}")
-        print(f"Traceback: {traceback.format_exc()}")
-        return """
-        <!DOCTYPE html>
-        <html>
-        <head>
-            <title>Error</title>
-            <style>
-                body { font-family: Arial, sans-serif; text-align: center; padding: 50px; }
-                .error { color: #dc3545; font-size: 24px; margin-bottom: 20px; }
-                .message { color: #333; font-size: 16px; }
-            </style>
-        </head>
-        <body>
-            <div class="error">✕</div>
-            <div class="message">An unexpected error occurred. Please try again later.</div>
-        </body>
-        </html>
-        """
+    except Exception:
+        logger.exception("Email-link unsubscribe failed")
+        return _HTML_ERROR, 200, _HTML_HEADERS
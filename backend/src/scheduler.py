@@ -2,18 +2,51 @@
 Scheduler module for periodic news processing.
 """
 import os
+import asyncio
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
-from datetime import datetime
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
 import logging
 from .news_processor.news_fetcher import NewsFetcher
 from .news_processor.content_extractor import ContentExtractor
 from .news_processor.summarizer import Summarizer
-from .services.email_service import EmailService
-from firebase_admin import firestore
+from .services.email_service import EmailService, MAX_BULK_RECIPIENTS
+from .utils.cache import invalidate_article_caches
+from .config.firebase import db
+from google.api_core import exceptions as google_exceptions
+from google.api_core.retry import Retry, if_exception_type
+from google.cloud.firestore_v1.base_query import FieldFilter
 
 logger = logging.getLogger(__name__)
 
+# Weekly run schedule, defaulting to Sunday 7 AM ET. The trigger is built at
+# import, where CronTrigger validates the day expression, hour, minute and
+# timezone, so bad config fails at startup instead of when the job is registered
+SCHEDULER_DAY = os.getenv('SCHEDULER_DAY', 'sun')
+SCHEDULER_HOUR = int(os.getenv('SCHEDULER_HOUR', '7'))
+SCHEDULER_MINUTE = int(os.getenv('SCHEDULER_MINUTE', '0'))
+SCHEDULER_TIMEZONE = os.getenv('SCHEDULER_TIMEZONE', 'America/New_York')
+_WEEKLY_TRIGGER = CronTrigger(
+    day_of_week=SCHEDULER_DAY,
+    hour=SCHEDULER_HOUR,
+    minute=SCHEDULER_MINUTE,
+    timezone=SCHEDULER_TIMEZONE
+)
+
+# Article writes in flight at once while storing a run's articles
+_MAX_CONCURRENT_WRITES = 40
+
+# Per-article write retry on transient failures, with exponential backoff for up to 30s
+_WRITE_RETRY = Retry(
+    predicate=if_exception_type(
+        google_exceptions.Aborted,
+        google_exceptions.DeadlineExceeded,
+        google_exceptions.ServiceUnavailable
+    ),
+    deadline=30
+)
+
 class NewsScheduler:
     def __init__(self):
         self.scheduler = AsyncIOScheduler()
@@ -21,26 +54,176 @@ class NewsScheduler:
         self.content_extractor = ContentExtractor()
         self.summarizer = Summarizer()
         self.email_service = EmailService()
-        self.db = firestore.client()
+        # Shared sync client created once at import by config.firebase
+        self.db = db
+
+    def _fetch_active_users(self) -> List[Dict]:
+        """
+        Read the active users, fetching only the fields the fan-out needs.
+        
+        Snapshots are turned into plain dicts as they stream in, so only the
+        projected fields stay in memory. Blocking; run it in a worker thread.
+        
+        Returns:
+            List of user dicts with their email and topic
+        """
+        users_ref = self.db.collection('users')
+        return [
+            user_doc.to_dict()
+            for user_doc in users_ref.where(filter=FieldFilter('status', '==', 'active'))
+            .select(['email', 'topic'])
+            .stream()
+        ]
+
+    async def _write_article(self, ref, doc: Dict, semaphore: asyncio.Semaphore):
+        """
+        Write one article document in a worker thread.
+        
+        The document ID is fixed by the caller, so a retry after a write that
+        did land overwrites it instead of adding a duplicate.
+        
+        Args:
+            ref: Document reference to write
+            doc: Article data
+            semaphore: Bounds concurrent writes across articles
+        """
+        async with semaphore:
+            await asyncio.to_thread(ref.set, doc, retry=_WRITE_RETRY)
+
+    async def store_articles(self, topic_summaries: Dict[str, Dict]) -> int:
+        """
+        Store the processed articles of every topic in Firestore.
+        
+        Articles are independent, so each is written on its own and up to
+        _MAX_CONCURRENT_WRITES writes run at once; one failed write does not
+        discard the rest, as it would inside a batch.
+        
+        Args:
+            topic_summaries: Dictionary mapping topics to their summary and articles
+            
+        Returns:
+            Number of articles stored
+        """
+        # One timestamp covers the whole run, stored natively for range queries
+        processed_at = datetime.now(timezone.utc)
+        docs = [
+            {
+                **article,
+                'summary': topic_data['summary'],
+                'topic': topic,
+                'processed_at': processed_at
+            }
+            for topic, topic_data in topic_summaries.items()
+            for article in topic_data['articles']
+        ]
+        if not docs:
+            return 0
+        
+        collection = self.db.collection('processed_articles')
+        semaphore = asyncio.Semaphore(_MAX_CONCURRENT_WRITES)
+        results = await asyncio.gather(
+            *[self._write_article(collection.document(), doc, semaphore) for doc in docs],
+            return_exceptions=True
+        )
+        
+        failures = [result for result in results if isinstance(result, Exception)]
+        for error in failures:
+            logger.error(f"Error storing article: {str(error)}")
+        
+        # Recent-article responses cached by the API are now stale
+        invalidate_article_caches()
+        return len(docs) - len(failures)
+
+    async def _process_topic(self, topic_value: str, search_terms: str) -> Optional[Dict]:
+        """
+        Fetch, extract and summarize the news for one topic.
+        
+        Args:
+            topic_value: Topic name
+            search_terms: Search query for the topic
+            
+        Returns:
+            Dictionary with the topic summary and its articles, or None when
+            nothing could be fetched, extracted or summarized
+        """
+        logger.info(f"Processing topic: {topic_value}")
+        
+        # Fetch news articles
+        articles = await self.news_fetcher.search_news(search_terms, "week")
+        if not articles:
+            logger.warning(f"No articles found for topic: {topic_value}")
+            return None
+            
+        logger.info(f"Found {len(articles)} articles for topic: {topic_value}")
+        
+        # Drop tracking-parameter duplicates; links shared with other topics are
+        # fetched once through the extractor's cache and in-flight dedupe
+        unique_articles = {}
+        for article in articles:
+            unique_articles.setdefault(self.content_extractor.normalize_url(article['link']), article)
+        articles = list(unique_articles.values())
+        
+        # Extract content from every article concurrently; the extractor bounds
+        # how many fetches are in flight
+        contents = await asyncio.gather(
+            *[self.content_extractor.extract_content(article['link']) for article in articles],
+            return_exceptions=True
+        )
+        
+        processed_articles = []
+        for article, content in zip(articles, contents):
+            if isinstance(content, Exception):
+                logger.error(f"Error extracting content for article: {str(content)}")
+            elif content:
+                # search_news hands out fresh copies, so the article can be extended in place
+                article.update(content)
+                processed_articles.append(article)
+        
+        if not processed_articles:
+            logger.warning(f"No content extracted for topic: {topic_value}")
+            return None
+            
+        # Generate summary
+        summary_result = await self.summarizer.batch_summarize(processed_articles)
+        if not summary_result.get('summary'):
+            logger.warning(f"No summary generated for topic: {topic_value}")
+            return None
+        
+        logger.info(f"Successfully processed topic: {topic_value}")
+        return {
+            'summary': summary_result['summary'],
+            'articles': processed_articles
+        }
 
     async def process_and_store_news(self):
         """Process news articles and send emails to users."""
         try:
             logger.info("Starting weekly news processing job")
             
-            # Step 1: Get all active users
-            users_ref = self.db.collection('users')
-            users = users_ref.where('status', '==', 'active').get()
+            # Step 1: Get all active users, off the event loop
+            users_data = await asyncio.to_thread(self._fetch_active_users)
             
-            if not users:
+            if not users_data:
                 logger.info("No active users found, skipping processing")
                 return
                 
-            logger.info(f"Found {len(users)} active users")
+            logger.info(f"Found {len(users_data)} active users")
+            
+            # Group subscribers by topic once so each topic's lookup is a dict hit
+            users_by_topic: Dict[str, List[Dict]] = {}
+            for user_data in users_data:
+                users_by_topic.setdefault(user_data.get('topic'), []).append(user_data)
             
             # Step 2: Get all active topics
             topics_ref = self.db.collection('topics')
-            topics = topics_ref.where('isActive', '==', True).get()
+            topics = await asyncio.to_thread(
+                lambda: [
+                    topic.to_dict()
+                    for topic in topics_ref.where(filter=FieldFilter('isActive', '==', True))
+                    .select(['name', 'searchTerms'])
+                    .stream()
+                ]
+            )
             
             if not topics:
                 logger.warning("No active topics found")
@@ -48,77 +231,40 @@ class NewsScheduler:
                 
             logger.info(f"Found {len(topics)} active topics")
             
-            # Step 3: Process each topic
+            # Step 3: Process every topic concurrently
+            topic_values = []
+            topic_jobs = []
+            for topic_data in topics:
+                topic_values.append(topic_data['name'])
+                topic_jobs.append(self._process_topic(topic_data['name'], topic_data['searchTerms']))
+            
+            topic_results = await asyncio.gather(*topic_jobs, return_exceptions=True)
+            
             topic_summaries = {}  # Store summaries by topic
+            for topic_value, topic_result in zip(topic_values, topic_results):
+                if isinstance(topic_result, Exception):
+                    logger.error(f"Error processing topic {topic_value}: {str(topic_result)}")
+                elif topic_result:
+                    topic_summaries[topic_value] = topic_result
             
-            for topic in topics:
-                topic_data = topic.to_dict()
-                topic_value = topic_data['name']
-                search_terms = topic_data['searchTerms']
-                
-                try:
-                    logger.info(f"Processing topic: {topic_value}")
-                    
-                    # Fetch news articles
-                    articles = await self.news_fetcher.search_news(search_terms, "week")
-                    if not articles:
-                        logger.warning(f"No articles found for topic: {topic_value}")
-                        continue
-                        
-                    logger.info(f"Found {len(articles)} articles for topic: {topic_value}")
-                    
-                    # Extract content from articles
-                    processed_articles = []
-                    for article in articles:
-                        try:
-                            content = await self.content_extractor.extract_content(article['link'])
-                            if content:
-                                processed_article = {
-                                    **article,
-                                    **content
-                                }
-                                processed_articles.append(processed_article)
-                        except Exception as e:
-                            logger.error(f"Error extracting content for article: {str(e)}")
-                            continue
-                    
-                    if not processed_articles:
-                        logger.warning(f"No content extracted for topic: {topic_value}")
-                        continue
-                        
-                    # Generate summary
-                    summary_result = await self.summarizer.batch_summarize(processed_articles)
-                    if not summary_result.get('summary'):
-                        logger.warning(f"No summary generated for topic: {topic_value}")
-                        continue
-                        
-                    topic_summaries[topic_value] = {
-                        'summary': summary_result['summary'],
-                        'articles': processed_articles
-                    }
-                    
-                    logger.info(f"Successfully processed topic: {topic_value}")
-                    
-                except Exception as e:
-                    logger.error(f"Error processing topic {topic_value}: {str(e)}")
-                    continue
+            # Step 4: Store the processed articles; emails still go out if this fails
+            try:
+                stored = await self.store_articles(topic_summaries)
+                logger.info(f"Stored {stored} processed articles")
+            except Exception as e:
+                logger.error(f"Error storing processed articles: {str(e)}")
             
-            # Step 4: Send emails to users for each topic
+            # Step 5: Send emails to users for each topic
             if topic_summaries:
                 logger.info("Starting email distribution")
                 
-                # Get all users and their topics
-                users_data = []
-                for user_doc in users:
-                    user_data = user_doc.to_dict()
-                    users_data.append(user_data)
-                
-                # Send emails for each topic that has a summary
+                # Queue one bulk send per group of subscribers of every topic that has a summary
+                deliveries = []
                 for topic, topic_data in topic_summaries.items():
                     logger.info(f"Sending emails for topic: {topic}")
                     
                     # Find all users subscribed to this topic
-                    topic_users = [user for user in users_data if user.get('topic') == topic]
+                    topic_users = users_by_topic.get(topic)
                     
                     if not topic_users:
                         logger.warning(f"No users found for topic: {topic}")
@@ -126,24 +272,31 @@ class NewsScheduler:
                         
                     logger.info(f"Found {len(topic_users)} users for topic: {topic}")
                     
-                    # Send email to each user
-                    for user_data in topic_users:
-                        try:
-                            email_sent = await self.email_service.send_summary(
-                                topic_data['summary'],
-                                topic_data['articles'],
-                                user_data['email'],
-                                topic
-                            )
-                            
-                            if email_sent:
-                                logger.info(f"Successfully sent email to {user_data['email']} for topic {topic}")
-                            else:
-                                logger.error(f"Failed to send email to {user_data['email']} for topic {topic}")
-                                
-                        except Exception as e:
-                            logger.error(f"Error sending email to {user_data['email']}: {str(e)}")
-                            continue
+                    # The body is the same for every subscriber, so render it once per topic
+                    body_html = self.email_service.render_body(topic_data['summary'], topic_data['articles'])
+                    recipients = [user_data['email'] for user_data in topic_users]
+                    deliveries.extend(
+                        (recipients[start:start + MAX_BULK_RECIPIENTS], topic, body_html)
+                        for start in range(0, len(recipients), MAX_BULK_RECIPIENTS)
+                    )
+                
+                # Send every group concurrently; EmailService bounds how many
+                # requests reach Brevo at once
+                results = await asyncio.gather(
+                    *[
+                        self.email_service.send_summary_bulk(body_html, recipients, topic)
+                        for recipients, topic, body_html in deliveries
+                    ],
+                    return_exceptions=True
+                )
+                
+                for (recipients, topic, _), email_sent in zip(deliveries, results):
+                    if isinstance(email_sent, Exception):
+                        logger.error(f"Error sending email to {len(recipients)} users for topic {topic}: {str(email_sent)}")
+                    elif email_sent:
+                        logger.info(f"Successfully sent email to {len(recipients)} users for topic {topic}")
+                    else:
+                        logger.error(f"Failed to send email to {len(recipients)} users for topic {topic}")
                 
                 logger.info("Email distribution completed")
             
@@ -155,18 +308,17 @@ class NewsScheduler:
 
     def start(self):
         """Start the scheduler."""
-        # Schedule job to run every Sunday at 7 AM ET
+        # Schedule the job on the SCHEDULER_* settings; a run can take many
+        # minutes, so never overlap runs or replay missed ones
         self.scheduler.add_job(
             self.process_and_store_news,
-            CronTrigger(
-                day_of_week=os.getenv('SCHEDULER_DAY'),
-                hour=os.getenv('SCHEDULER_HOUR'),
-                minute=os.getenv('SCHEDULER_MINUTE'),
-                timezone=os.getenv('SCHEDULER_TIMEZONE')
-            ),
+            _WEEKLY_TRIGGER,
             id='weekly_news_processing',
             name='Process and send weekly news',
-            replace_existing=True
+            replace_existing=True,
+            coalesce=True,
+            max_instances=1,
+            misfire_grace_time=3600
         )
         
         self.scheduler.start()
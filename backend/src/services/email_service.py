@@ -2,18 +2,86 @@
 Email service for sending newsletters and notifications using Brevo API.
 """
 import os
+import re
 import logging
 from typing import Dict, List, Optional
-import requests
+import aiohttp
+import orjson
 from dotenv import load_dotenv
 import asyncio
 import traceback
+from pathlib import Path
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from urllib.parse import quote
+from jinja2 import Environment, FileSystemLoader
+from ..utils.http_session import get_session
 
 logger = logging.getLogger(__name__)
 
+# Brevo responses that mean the email was not accepted, so a retry cannot
+# deliver it twice; POST /smtp/email has no idempotency key
+_RETRY_STATUSES = frozenset({429, 503})
+_MAX_SEND_ATTEMPTS = 3
+# Backoff used when a retryable response carries no usable Retry-After header
+_RETRY_BACKOFF = 0.3
+# Longest Retry-After honoured before giving up on the send
+_MAX_RETRY_AFTER = 60
+
+# Subscribers per bulk /smtp/email request. Brevo accepts up to 2000 recipients
+# across a request's message versions; smaller groups limit how many people a
+# single rejected request affects
+MAX_BULK_RECIPIENTS = 99
+
+# Openers of Brevo's template tags ({{, {% and {#); bulk bodies are sent with
+# params, so these are neutralized in content that must not be templated
+_TEMPLATE_TAG_RE = re.compile(r'\{([{%#])')
+
+def _escape_template_tags(html: str) -> str:
+    """Break up template tag openers so Brevo passes the text through verbatim."""
+    return _TEMPLATE_TAG_RE.sub(lambda match: '{&#%d;' % ord(match.group(1)), html)
+
+# Upper bound on a single Brevo request, so a stalled connection cannot hang the fan-out
+_SEND_TIMEOUT = aiohttp.ClientTimeout(total=15)
+
+# Templates are parsed once per process and never reloaded from disk
+_templates = Environment(
+    loader=FileSystemLoader(Path(__file__).parent / 'templates'),
+    autoescape=True,
+    auto_reload=False,
+    cache_size=50
+)
+_body_template = _templates.get_template('newsletter_body.html')
+
+def _retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    Parse a Retry-After header into seconds to wait.
+    
+    Args:
+        value: Header value, either delay seconds or an HTTP date
+        
+    Returns:
+        Seconds to wait, or None when the header is missing or malformed
+    """
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdecimal():
+        return float(value)
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
 class EmailService:
-    def __init__(self):
+    def __init__(self, session: Optional[aiohttp.ClientSession] = None):
         load_dotenv()
+        # Falls back to the application-wide session when none is injected, so
+        # sends reuse keep-alive connections to Brevo
+        self._session = session
         self.api_key = os.getenv('BREVO_API_KEY')
         self.frontend_url = os.getenv('FRONTEND_URL')
         self.backend_url = os.getenv('BACKEND_URL')
@@ -21,22 +89,41 @@ class EmailService:
             raise ValueError("BREVO_API_KEY environment variable is not set")
         
         self.base_url = "https://api.brevo.com/v3"
+        # Bounds concurrent Brevo requests across every caller of this service
+        self._send_semaphore = asyncio.Semaphore(int(os.getenv('EMAIL_CONCURRENCY', 20)))
         self.headers = {
             "accept": "application/json",
             "api-key": self.api_key,
             "content-type": "application/json"
         }
+        
+        # The footer only varies by recipient address, so everything around it
+        # is formatted once here and joined with the address per email
+        self._footer_head = f"""
+            </div>
+            <div class="footer">
+                <p>This is an automated AI generated newsletter from <a href="{self.frontend_url}">Subscribe to AI Newsletter by Deep Patel</a>.</p>
+                <p>To unsubscribe, please visit our website or <a href="{self.backend_url}/unsubscribe-email?email="""
+        self._footer_tail = """">click here</a>.</p>
+            </div>
+        </body>
+        </html>
+        """
 
-    def _create_html_content(self, summary: str, articles: List[Dict], send_to_email: str) -> str:
+    def render_body(self, summary: str, articles: List[Dict]) -> str:
         """
-        Create HTML content for the email.
+        Render the recipient-independent part of the email.
+        
+        The result is the same for every subscriber of a topic, so the weekly
+        job renders it once and passes it to send_summary_bulk, where each
+        message version only adds the recipient's unsubscribe link.
         
         Args:
             summary: The main summary content
             articles: List of articles with their metadata
             
         Returns:
-            Formatted HTML string
+            HTML up to, but not including, the per-recipient footer
         """
         # Trim markdown code block markers if present
         summary = summary.strip()
@@ -46,55 +133,105 @@ class EmailService:
             summary = summary[:-3]
         summary = summary.strip()
         
-        # Start with the summary
-        html_content = f"""
-        <!DOCTYPE html>
-        <html>
-        <head>
-            <style>
-                body {{ font-family: Arial, sans-serif; line-height: 1.6; color: #333; }}
-                .summary {{ margin-bottom: 20px; }}
-                .articles {{ margin-top: 20px; }}
-                .article {{ margin-bottom: 15px; padding: 10px; border-left: 3px solid #007bff; }}
-                .title {{ font-weight: bold; color: #007bff; }}
-                .source {{ color: #666; font-size: 0.9em; }}
-                .link {{ color: #007bff; text-decoration: none; }}
-                .footer {{ margin-top: 20px; padding-top: 20px; border-top: 1px solid #eee; font-size: 0.8em; color: #666; }}
-            </style>
-        </head>
-        <body>
-            <div>
-                <h1>Hey there! 🙋</h1>
-            </div>
-            <div class="summary">
-                {summary}
-            </div>
-            <div class="articles">
-                <h2>Source Articles</h2>
+        # The summary is HTML written by the model; article fields are escaped
+        return _body_template.render(summary=summary, articles=articles)
+
+    def _render_footer(self, send_to_email: str) -> str:
+        """Render the footer carrying the recipient's unsubscribe link."""
+        # Quoted so addresses with '+' or '&' survive the query string
+        return self._footer_head + quote(send_to_email, safe='@') + self._footer_tail
+
+    async def _post_email(self, email_data: Dict) -> bool:
         """
+        Post an email to Brevo's transactional endpoint.
         
-        # Add each article
-        for article in articles:
-            html_content += f"""
-                <div class="article">
-                    <div class="title">{article.get('title', 'Untitled')}</div>
-                    <div class="source">{article.get('source', 'Unknown')} - {article.get('date', 'Unknown')}</div>
-                    <a href="{article.get('link', '#')}" class="link">Read original article</a>
-                </div>
-            """
+        Only 429 and 503 responses, which mean Brevo did not accept the email,
+        are retried. The wait follows their Retry-After header, with exponential
+        backoff as the fallback, and the concurrency slot is released meanwhile.
+        Timeouts and connection errors are not retried, since the request may
+        already have been accepted and sending it again could deliver twice.
         
-        # Add footer
-        html_content += f"""
-            </div>
-            <div class="footer">
-                <p>This is an automated AI generated newsletter from <a href="{self.frontend_url}">Subscribe to AI Newsletter by Deep Patel</a>.</p>
-                <p>To unsubscribe, please visit our website or <a href="{self.backend_url}/unsubscribe-email?email={send_to_email}">click here</a>.</p>
-            </div>
-        </body>
-        </html>
+        Args:
+            email_data: Request body for /smtp/email
+            
+        Returns:
+            True if Brevo accepted the email, False otherwise
         """
+        url = f"{self.base_url}/smtp/email"
+        # orjson encodes straight to bytes; the content type is in self.headers
+        payload = orjson.dumps(email_data)
+        session = self._session or await get_session()
+        for attempt in range(_MAX_SEND_ATTEMPTS):
+            try:
+                async with self._send_semaphore:
+                    async with session.post(url, headers=self.headers, data=payload, timeout=_SEND_TIMEOUT) as response:
+                        if response.status == 201:
+                            return True
+                        if response.status not in _RETRY_STATUSES or attempt == _MAX_SEND_ATTEMPTS - 1:
+                            logger.error(f"Failed to send email. Status code: {response.status}")
+                            logger.error(f"Response: {await response.text()}")
+                            return False
+                        delay = _retry_after(response.headers.get('Retry-After'))
+            except (asyncio.TimeoutError, aiohttp.ClientError) as e:
+                logger.error(f"Email request to Brevo did not complete, not retrying: {type(e).__name__}: {str(e)}")
+                return False
+            
+            if delay is None:
+                delay = _RETRY_BACKOFF * 2 ** attempt
+            if delay > _MAX_RETRY_AFTER:
+                logger.error(f"Brevo asked to retry in {delay:.0f}s, giving up")
+                return False
+            logger.warning(f"Brevo returned {response.status}, retrying in {delay:.1f}s")
+            await asyncio.sleep(delay)
+        return False
+
+    async def send_summary_bulk(self, body_html: str, recipients: List[str], topic: str) -> bool:
+        """
+        Send one topic's summary to several subscribers in a single Brevo request.
+        
+        Each recipient is a separate message version, so nobody sees the other
+        addresses, and Brevo fills in that recipient's unsubscribe link from
+        its params.
         
-        return html_content
+        Args:
+            body_html: Output of render_body for the topic
+            recipients: At most MAX_BULK_RECIPIENTS email addresses
+            topic: Topic the summary covers
+            
+        Returns:
+            True if Brevo accepted the emails, False otherwise
+        """
+        try:
+            email_data = {
+                "sender": {
+                    "name": "Subscribe to AI Newsletter by Deep Patel",
+                    "email": os.getenv('FROM_EMAIL')
+                },
+                "subject": f"Weekly News Summary for {topic}",
+                # Only the footer placeholder may be templated; the summary and
+                # article fields can contain anything
+                "htmlContent": (
+                    _escape_template_tags(body_html) + self._footer_head
+                    + "{{ params.unsubscribe_email }}" + self._footer_tail
+                ),
+                "messageVersions": [
+                    {
+                        "to": [{"email": recipient}],
+                        "params": {"unsubscribe_email": quote(recipient, safe='@')}
+                    }
+                    for recipient in recipients
+                ]
+            }
+            
+            if await self._post_email(email_data):
+                logger.info(f"Email sent successfully to {len(recipients)} recipients for topic {topic}")
+                return True
+            return False
+            
+        except Exception as e:
+            logger.error(f"Error sending bulk email: {str(e)}")
+            logger.error(f"Traceback: {traceback.format_exc()}")
+            return False
 
     async def send_summary(self, summary: str, articles: List[Dict], send_to_email: str, topic: str) -> bool:
         """
@@ -104,12 +241,26 @@ class EmailService:
             summary: The main summary content
             articles: List of articles with their metadata
             
+        Returns:
+            True if email was sent successfully, False otherwise
+        """
+        return await self.send_summary_prerendered(self.render_body(summary, articles), send_to_email, topic)
+
+    async def send_summary_prerendered(self, body_html: str, send_to_email: str, topic: str) -> bool:
+        """
+        Send a summary email whose body was already rendered with render_body.
+        
+        Args:
+            body_html: Output of render_body for the recipient's topic
+            send_to_email: Recipient email address
+            topic: Topic the summary covers
+            
         Returns:
             True if email was sent successfully, False otherwise
         """
         try:
-            # Create HTML content
-            html_content = self._create_html_content(summary, articles, send_to_email)
+            # Append the recipient's footer to the shared body
+            html_content = body_html + self._render_footer(send_to_email)
             
             # Prepare email data
             email_data = {
@@ -123,21 +274,10 @@ class EmailService:
             }
             
             # Send email using Brevo API
-            url = f"{self.base_url}/smtp/email"
-            response = await asyncio.to_thread(
-                requests.post,
-                url,
-                headers=self.headers,
-                json=email_data
-            )
-            
-            if response.status_code == 201:
+            if await self._post_email(email_data):
                 logger.info(f"Email sent successfully to {send_to_email}")
                 return True
-            else:
-                logger.error(f"Failed to send email. Status code: {response.status_code}")
-                logger.error(f"Response: {response.text}")
-                return False
+            return False
                 
         except Exception as e:
             logger.error(f"Error sending email: {str(e)}")
@@ -0,0 +1,64 @@
+"""
+Query parameter parsing and pagination cursors for the article endpoints.
+"""
+import base64
+import re
+from datetime import datetime
+from typing import Any, Dict, Mapping, Optional, Tuple
+
+# Largest page the article endpoints will return in one response
+MAX_ARTICLES_LIMIT = 100
+# Times may end in Z, as JavaScript's toISOString() produces, or a +HH:MM offset
+_DATE_RE = re.compile(r'\d{4}-\d{2}-\d{2}(?:[T ]\d{2}:\d{2}(?::\d{2}(?:\.\d+)?)?(?:Z|[+-]\d{2}:\d{2})?)?')
+
+def parse_iso_date(value: str) -> Optional[datetime]:
+    """Parse an ISO date or datetime, returning None when it is malformed."""
+    if not _DATE_RE.fullmatch(value):
+        return None
+    try:
+        # The pattern admits out-of-range values such as month 13
+        return datetime.fromisoformat(value)
+    except ValueError:
+        return None
+
+def parse_article_args(args: Mapping[str, str]) -> Tuple[Dict[str, Any], Optional[str]]:
+    """
+    Validate the article endpoints' query parameters in one pass.
+    
+    Args:
+        args: The request's query parameters
+    
+    Returns:
+        Tuple of the parsed topic, start_date, end_date, limit and cursor, and an error
+        message for the first invalid parameter (None when all are valid)
+    """
+    limit = args.get('limit', '10')
+    # isdecimal, unlike isdigit, rejects characters such as '²' that int() cannot parse
+    if not limit.isdecimal() or not 1 <= int(limit) <= MAX_ARTICLES_LIMIT:
+        return {}, f'Invalid limit. Use an integer between 1 and {MAX_ARTICLES_LIMIT}'
+    
+    values = {'topic': args.get('topic') or None, 'limit': int(limit)}
+    for name in ('start_date', 'end_date'):
+        value = args.get(name)
+        parsed = parse_iso_date(value) if value else None
+        if value and parsed is None:
+            return {}, f'Invalid {name} format. Use ISO format (YYYY-MM-DD)'
+        values[name] = parsed
+    
+    cursor = args.get('cursor')
+    values['cursor'] = decode_cursor(cursor) if cursor else None
+    if cursor and (values['cursor'] is None or not values['cursor'][1]):
+        return {}, 'Invalid cursor'
+    return values, None
+
+def encode_cursor(processed_at: datetime, doc_id: str) -> str:
+    """Encode the position after a document as an opaque pagination cursor."""
+    return base64.urlsafe_b64encode(f"{processed_at.isoformat()}|{doc_id}".encode()).decode()
+
+def decode_cursor(cursor: str) -> Optional[Tuple[datetime, str]]:
+    """Decode a pagination cursor, returning None when it is malformed."""
+    try:
+        processed_at, _, doc_id = base64.urlsafe_b64decode(cursor.encode()).decode().partition('|')
+        return datetime.fromisoformat(processed_at), doc_id
+    except ValueError:
+        return None
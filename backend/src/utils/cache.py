@@ -0,0 +1,24 @@
+"""
+In-process response caches shared by the request handlers and the scheduler.
+"""
+from cachetools import TTLCache
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Encoded /articles/recent bodies keyed by (topic, limit, fields); new articles
+# arrive at most a few times a day, so a short TTL bounds staleness
+RECENT_ARTICLES_TTL = 300
+recent_articles_cache = TTLCache(maxsize=256, ttl=RECENT_ARTICLES_TTL)
+
+# Encoded /topics body; topics change rarely, so bursts of requests share one
+# Firestore read, and concurrent misses wait on the lock instead of querying too
+TOPICS_RESPONSE_TTL = 60
+topics_response_cache = TTLCache(maxsize=1, ttl=TOPICS_RESPONSE_TTL)
+topics_response_lock = asyncio.Lock()
+
+def invalidate_article_caches():
+    """Drop cached article responses; call after new articles are stored."""
+    recent_articles_cache.clear()
+    logger.info("Cleared cached article responses")
@@ -1,7 +1,9 @@
 """
 Firebase utility functions for the AI News Research Assistant.
 """
-from firebase_admin import firestore
+from ..config.firebase import db
+from google.cloud.firestore_v1.base_query import FieldFilter
+import asyncio
 import logging
 from typing import List, Dict, Any
 
@@ -15,16 +17,13 @@ def get_active_topics() -> List[Dict[str, str]]:
         List of active topics with their search terms
     """
     try:
-        db = firestore.client()
         topics_ref = db.collection('topics')
         
-        # Query for active topics
-        query = topics_ref.where('isActive', '==', True)
-        topics = query.get()
+        # Query for active topics, formatting each result as it streams in
+        query = topics_ref.where(filter=FieldFilter('isActive', '==', True)).select(['name', 'searchTerms'])
         
-        # Format the results
         formatted_topics = []
-        for topic in topics:
+        for topic in query.stream():
             topic_data = topic.to_dict()
             formatted_topics.append({
                 'value': topic_data['name'],
@@ -47,14 +46,13 @@ async def has_active_users() -> bool:
         True if there are active users, False otherwise
     """
     try:
-        db = firestore.client()
         users_ref = db.collection('users')
         
-        # Query for active users
-        query = users_ref.where('status', '==', 'active')
-        users = await query.get()
+        # Only existence matters, so Firestore can stop after the first match;
+        # the sync client runs in a worker thread to keep the event loop free
+        query = users_ref.where(filter=FieldFilter('status', '==', 'active')).limit(1)
+        has_users = await asyncio.to_thread(lambda: next(query.stream(), None) is not None)
         
-        has_users = len(users) > 0
         logger.info(f"Active users check: {has_users}")
         return has_users
         
@@ -0,0 +1,40 @@
+"""
+Shared HTTP session utilities for the AI News Research Assistant.
+"""
+from typing import Optional
+import aiohttp
+import logging
+
+logger = logging.getLogger(__name__)
+
+_session: Optional[aiohttp.ClientSession] = None
+
+async def get_session() -> aiohttp.ClientSession:
+    """
+    Return the application-wide HTTP session, creating it on first use.
+    
+    The session is created lazily so it binds to the running event loop, and
+    is shared so keep-alive connections and the DNS cache survive across calls.
+    
+    Returns:
+        The shared aiohttp client session
+    """
+    global _session
+    if _session is None or _session.closed:
+        connector = aiohttp.TCPConnector(
+            limit=100,
+            limit_per_host=10,
+            ttl_dns_cache=300,
+            keepalive_timeout=75
+        )
+        _session = aiohttp.ClientSession(connector=connector)
+        logger.info("Created shared HTTP session")
+    return _session
+
+async def close_session():
+    """Close the application-wide HTTP session."""
+    global _session
+    if _session is not None and not _session.closed:
+        await _session.close()
+        logger.info("Closed shared HTTP session")
+    _session = None
@@ -0,0 +1,36 @@
+"""
+orjson-backed JSON provider for the Quart application.
+"""
+from datetime import date
+from typing import Any
+import orjson
+from quart.json.provider import DefaultJSONProvider
+
+class OrjsonProvider(DefaultJSONProvider):
+    """Serialize and parse request and response bodies with orjson."""
+
+    # Keep dicts with non-string keys working as they did with the stdlib encoder
+    option = orjson.OPT_NON_STR_KEYS
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        """
+        Serialize obj to a JSON string.
+        
+        Types orjson does not handle natively fall back to the default provider's
+        conversions (dates, decimals, dataclasses, UUIDs).
+        """
+        return self.dumps_bytes(obj).decode()
+
+    def dumps_bytes(self, obj: Any) -> bytes:
+        """Serialize obj straight to UTF-8 bytes, for bodies that are cached and reused."""
+        return orjson.dumps(obj, default=self._default, option=self.option)
+
+    def _default(self, o: Any) -> Any:
+        """Render dates (including Firestore timestamps) as ISO 8601 like stored strings were."""
+        if isinstance(o, date):
+            return o.isoformat()
+        return self.default(o)
+
+    def loads(self, s: str | bytes, **kwargs: Any) -> Any:
+        """Parse a JSON string or bytes."""
+        return orjson.loads(s)
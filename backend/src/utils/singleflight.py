@@ -0,0 +1,52 @@
+"""
+Request coalescing for concurrent identical upstream calls.
+"""
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+# Calls currently in flight, keyed by the caller-supplied key
+_in_flight: Dict[Hashable, asyncio.Future] = {}
+
+async def singleflight(key: Hashable, call: Callable[[], Awaitable[Any]]) -> Any:
+    """
+    Run call() unless an identical call is already running, then share its outcome.
+    
+    The first caller for a key performs the call; later callers await the same
+    result or exception. asyncio.shield keeps a cancelled waiter from cancelling
+    the shared call, and if the first caller is cancelled a waiter runs it instead.
+    
+    Args:
+        key: Identifies equivalent calls; include a namespace to avoid collisions
+        call: Zero-argument factory returning the awaitable to run
+        
+    Returns:
+        The result of the shared call
+    """
+    while True:
+        pending = _in_flight.get(key)
+        if pending is None:
+            break
+        try:
+            return await asyncio.shield(pending)
+        except asyncio.CancelledError:
+            # Only the caller that ran the call was cancelled; take the call over
+            if not pending.cancelled():
+                raise
+    
+    future = asyncio.get_running_loop().create_future()
+    _in_flight[key] = future
+    try:
+        result = await call()
+    except asyncio.CancelledError:
+        future.cancel()
+        raise
+    except Exception as e:
+        future.set_exception(e)
+        # Mark the exception as retrieved when nobody else was waiting
+        future.exception()
+        raise
+    else:
+        future.set_result(result)
+        return result
+    finally:
+        del _in_flight[key]
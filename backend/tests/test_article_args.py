@@ -0,0 +1,86 @@
+from datetime import datetime, timezone
+
+from src.utils.article_args import (
+    MAX_ARTICLES_LIMIT,
+    decode_cursor,
+    encode_cursor,
+    parse_article_args,
+    parse_iso_date,
+)
+
+
+def test_cursor_round_trip():
+    processed_at = datetime(2024, 5, 1, 12, 30, 15, 123456, tzinfo=timezone.utc)
+    cursor = encode_cursor(processed_at, 'doc|with|pipes')
+    assert decode_cursor(cursor) == (processed_at, 'doc|with|pipes')
+
+
+def test_cursor_is_url_safe():
+    cursor = encode_cursor(datetime(2024, 5, 1, tzinfo=timezone.utc), '???>>>')
+    assert '+' not in cursor and '/' not in cursor
+
+
+def test_decode_cursor_rejects_malformed_input():
+    assert decode_cursor('not base64!') is None
+    # Valid base64, but the timestamp half is not ISO
+    assert decode_cursor('eWVzdGVyZGF5fGFiYw==') is None
+
+
+def test_parse_iso_date():
+    assert parse_iso_date('2024-05-01') == datetime(2024, 5, 1)
+    assert parse_iso_date('2024-05-01T08:15') == datetime(2024, 5, 1, 8, 15)
+    assert parse_iso_date('2024-05-01 08:15:30+02:00').utcoffset().total_seconds() == 7200
+    assert parse_iso_date('2024-05-01T00:00:00.000Z') == datetime(2024, 5, 1, tzinfo=timezone.utc)
+    assert parse_iso_date('2024-05-01T08:15Z') == datetime(2024, 5, 1, 8, 15, tzinfo=timezone.utc)
+    for value in ('2024-13-01', '2024-5-1', '01/05/2024', '2024-05-01T08', '2024-05-01T08:15Zulu'):
+        assert parse_iso_date(value) is None, value
+
+
+def test_parse_article_args_defaults():
+    values, error = parse_article_args({})
+    assert error is None
+    assert values == {'topic': None, 'limit': 10, 'start_date': None, 'end_date': None, 'cursor': None}
+
+
+def test_parse_article_args_accepts_valid_values():
+    processed_at = datetime(2024, 5, 1, tzinfo=timezone.utc)
+    values, error = parse_article_args({
+        'topic': 'AI',
+        'limit': str(MAX_ARTICLES_LIMIT),
+        'start_date': '2024-04-01',
+        'end_date': '2024-05-01',
+        'cursor': encode_cursor(processed_at, 'abc'),
+    })
+    assert error is None
+    assert values['topic'] == 'AI'
+    assert values['limit'] == MAX_ARTICLES_LIMIT
+    assert values['start_date'] == datetime(2024, 4, 1)
+    assert values['end_date'] == datetime(2024, 5, 1)
+    assert values['cursor'] == (processed_at, 'abc')
+
+
+def test_parse_article_args_rejects_bad_limits():
+    for limit in ('0', str(MAX_ARTICLES_LIMIT + 1), '-1', '1.5', 'ten', '', ' 5', '²'):
+        values, error = parse_article_args({'limit': limit})
+        assert values == {}, limit
+        assert error.startswith('Invalid limit'), limit
+
+
+def test_parse_article_args_accepts_javascript_timestamps():
+    values, error = parse_article_args({'start_date': '2024-05-01T00:00:00.000Z'})
+    assert error is None
+    assert values['start_date'] == datetime(2024, 5, 1, tzinfo=timezone.utc)
+
+
+def test_parse_article_args_rejects_bad_dates():
+    values, error = parse_article_args({'start_date': '2024-02-30'})
+    assert values == {} and error.startswith('Invalid start_date')
+    values, error = parse_article_args({'end_date': 'yesterday'})
+    assert values == {} and error.startswith('Invalid end_date')
+
+
+def test_parse_article_args_rejects_bad_cursors():
+    # Undecodable, and decodable but missing the document id
+    for cursor in ('%%%', encode_cursor(datetime(2024, 5, 1), '')):
+        values, error = parse_article_args({'cursor': cursor})
+        assert (values, error) == ({}, 'Invalid cursor')
@@ -0,0 +1,119 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+
+import pytest
+
+for module in ('aiohttp', 'dotenv', 'jinja2', 'orjson'):
+    pytest.importorskip(module)
+
+import aiohttp
+
+from src.services import email_service
+from src.services.email_service import EmailService, _retry_after
+
+
+class FakeResponse:
+    def __init__(self, status, headers=None):
+        self.status = status
+        self.headers = headers or {}
+
+    async def text(self):
+        return ''
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+
+class FakeSession:
+    """Replays one response, or raises one exception, per post call."""
+
+    def __init__(self, *outcomes):
+        self.outcomes = list(outcomes)
+        self.posts = 0
+
+    def post(self, url, **kwargs):
+        self.posts += 1
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, BaseException):
+            raise outcome
+        return outcome
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    delays = []
+
+    async def fake_sleep(delay):
+        delays.append(delay)
+
+    monkeypatch.setattr(email_service.asyncio, 'sleep', fake_sleep)
+    return delays
+
+
+def _post(monkeypatch, session):
+    monkeypatch.setenv('BREVO_API_KEY', 'test-key')
+    service = EmailService(session=session)
+    return asyncio.run(service._post_email({'subject': 'test'}))
+
+
+def test_retry_after_parses_seconds_and_dates():
+    assert _retry_after('5') == 5.0
+    assert _retry_after(' 12 ') == 12.0
+    assert _retry_after(None) is None
+    assert _retry_after('') is None
+    assert _retry_after('soon') is None
+    assert _retry_after('-3') is None
+    assert _retry_after(format_datetime(datetime.now(timezone.utc) - timedelta(minutes=5), usegmt=True)) == 0.0
+    later = _retry_after(format_datetime(datetime.now(timezone.utc) + timedelta(seconds=30), usegmt=True))
+    assert 25 <= later <= 30
+
+
+def test_post_email_succeeds_first_time(monkeypatch, sleeps):
+    session = FakeSession(FakeResponse(201))
+    assert _post(monkeypatch, session) is True
+    assert session.posts == 1 and sleeps == []
+
+
+def test_post_email_backs_off_on_unavailable(monkeypatch, sleeps):
+    session = FakeSession(FakeResponse(503), FakeResponse(503), FakeResponse(201))
+    assert _post(monkeypatch, session) is True
+    assert session.posts == 3
+    assert sleeps == [email_service._RETRY_BACKOFF, email_service._RETRY_BACKOFF * 2]
+
+
+def test_post_email_follows_retry_after(monkeypatch, sleeps):
+    session = FakeSession(FakeResponse(429, {'Retry-After': '2'}), FakeResponse(201))
+    assert _post(monkeypatch, session) is True
+    assert sleeps == [2.0]
+
+
+def test_post_email_gives_up_on_long_retry_after(monkeypatch, sleeps):
+    session = FakeSession(FakeResponse(429, {'Retry-After': str(email_service._MAX_RETRY_AFTER + 1)}))
+    assert _post(monkeypatch, session) is False
+    assert session.posts == 1 and sleeps == []
+
+
+def test_post_email_stops_after_max_attempts(monkeypatch, sleeps):
+    session = FakeSession(*[FakeResponse(503) for _ in range(email_service._MAX_SEND_ATTEMPTS)])
+    assert _post(monkeypatch, session) is False
+    assert session.posts == email_service._MAX_SEND_ATTEMPTS
+    assert len(sleeps) == email_service._MAX_SEND_ATTEMPTS - 1
+
+
+@pytest.mark.parametrize('status', [400, 401, 500, 502])
+def test_post_email_does_not_retry_other_statuses(monkeypatch, sleeps, status):
+    session = FakeSession(FakeResponse(status))
+    assert _post(monkeypatch, session) is False
+    assert session.posts == 1 and sleeps == []
+
+
+@pytest.mark.parametrize('error', [asyncio.TimeoutError(), aiohttp.ClientConnectionError('reset')])
+def test_post_email_does_not_retry_incomplete_requests(monkeypatch, sleeps, error):
+    # Brevo may already have accepted the email, so resending could deliver it twice
+    session = FakeSession(error)
+    assert _post(monkeypatch, session) is False
+    assert session.posts == 1 and sleeps == []
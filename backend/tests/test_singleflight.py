@@ -0,0 +1,90 @@
+import asyncio
+
+import pytest
+
+from src.utils import singleflight as singleflight_module
+from src.utils.singleflight import singleflight
+
+
+def test_concurrent_callers_share_one_call():
+    calls = 0
+
+    async def fetch():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return 'result'
+
+    async def main():
+        return await asyncio.gather(*[singleflight('key', fetch) for _ in range(10)])
+
+    assert asyncio.run(main()) == ['result'] * 10
+    assert calls == 1
+    assert singleflight_module._in_flight == {}
+
+
+def test_exception_reaches_every_waiter():
+    async def fetch():
+        await asyncio.sleep(0.01)
+        raise RuntimeError('upstream failed')
+
+    async def main():
+        return await asyncio.gather(*[singleflight('key', fetch) for _ in range(3)], return_exceptions=True)
+
+    results = asyncio.run(main())
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert singleflight_module._in_flight == {}
+
+
+def test_cancelled_waiter_leaves_shared_call_running():
+    async def fetch():
+        await asyncio.sleep(0.02)
+        return 'result'
+
+    async def main():
+        leader = asyncio.create_task(singleflight('key', fetch))
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(singleflight('key', fetch))
+        await asyncio.sleep(0)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        return await leader
+
+    assert asyncio.run(main()) == 'result'
+
+
+def test_waiter_takes_over_when_leader_is_cancelled():
+    calls = 0
+
+    async def fetch():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.02)
+        return calls
+
+    async def main():
+        leader = asyncio.create_task(singleflight('key', fetch))
+        await asyncio.sleep(0)
+        waiters = [asyncio.create_task(singleflight('key', fetch)) for _ in range(3)]
+        await asyncio.sleep(0)
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return await asyncio.gather(*waiters)
+
+    # One waiter reruns the call and the others share its result
+    assert asyncio.run(main()) == [2, 2, 2]
+    assert calls == 2
+    assert singleflight_module._in_flight == {}
+
+
+def test_distinct_keys_do_not_coalesce():
+    async def fetch(value):
+        await asyncio.sleep(0.01)
+        return value
+
+    async def main():
+        return await asyncio.gather(singleflight('a', lambda: fetch(1)), singleflight('b', lambda: fetch(2)))
+
+    assert asyncio.run(main()) == [1, 2]
@@ -0,0 +1,108 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+# Importing the package pulls in the whole pipeline, not just the summarizer
+for module in ('google.generativeai', 'cachetools', 'aiohttp', 'selectolax'):
+    pytest.importorskip(module)
+
+from src.news_processor.summarizer import Summarizer, _format_article, _split_sections
+
+
+def _estimate_tokens(text):
+    return len(text) >> 2
+
+
+@pytest.fixture
+def summarizer():
+    # Skip __init__, which needs a Gemini key and client
+    instance = Summarizer.__new__(Summarizer)
+    instance._count_tokens = _estimate_tokens
+    instance.max_article_chars = 4000
+    instance.max_prompt_chars = 60000
+    instance.summary_prompt = 'Summarize'
+    instance.sections_prompt = 'Use sections'
+    return instance
+
+
+def _article(index, size):
+    return {'title': f'Article {index}', 'link': f'https://example.com/{index}', 'content': 'x' * size}
+
+
+def test_chunk_articles_keeps_small_sets_in_one_chunk(summarizer):
+    articles = [_article(i, 100) for i in range(5)]
+    chunks = summarizer._chunk_articles(articles, max_tokens=10000)
+    assert chunks == [[(article, _format_article(article)) for article in articles]]
+    assert summarizer._chunk_articles([], max_tokens=10000) == []
+
+
+def test_chunk_articles_packs_within_limit_and_keeps_order(summarizer):
+    sizes = [900, 200, 1500, 300, 1200, 100, 700, 400, 1000, 250]
+    articles = [_article(i, size) for i, size in enumerate(sizes)]
+    max_tokens = 500
+    chunks = summarizer._chunk_articles(articles, max_tokens)
+    
+    packed = [article for chunk in chunks for article, _ in chunk]
+    assert sorted(packed, key=articles.index) == articles
+    assert len(packed) == len(articles)
+    
+    for chunk in chunks:
+        assert all(text == _format_article(article) for article, text in chunk)
+        assert sum(_estimate_tokens(text) for _, text in chunk) <= max_tokens
+        positions = [articles.index(article) for article, _ in chunk]
+        assert positions == sorted(positions)
+    
+    # First-fit-decreasing needs fewer chunks than filling them in input order
+    sequential, used = 1, 0
+    for article in articles:
+        tokens = _estimate_tokens(_format_article(article))
+        if used + tokens > max_tokens:
+            sequential, used = sequential + 1, 0
+        used += tokens
+    assert len(chunks) < sequential
+
+
+def test_chunk_articles_gives_oversized_articles_their_own_chunk(summarizer):
+    articles = [_article(0, 100), _article(1, 5000), _article(2, 100)]
+    chunks = summarizer._chunk_articles(articles, max_tokens=200)
+    assert [[article for article, _ in chunk] for chunk in chunks] == [[articles[1]], [articles[0], articles[2]]]
+
+
+def test_split_sections():
+    text = "Intro the model added\n===ARTICLE 1===\nFirst summary\n\n  ===ARTICLE 2===  \nSecond summary\n"
+    assert _split_sections(text) == {1: 'First summary', 2: 'Second summary'}
+
+
+def test_split_sections_without_delimiters():
+    assert _split_sections('Just one summary') == {}
+
+
+def test_split_sections_ignores_inline_markers():
+    text = "===ARTICLE 1===\nSee ===ARTICLE 2=== for more\n"
+    assert _split_sections(text) == {1: 'See ===ARTICLE 2=== for more'}
+
+
+def _run_sections(summarizer, contents, text):
+    async def generate(prompt):
+        return SimpleNamespace(text=text)
+    summarizer._generate = generate
+    return asyncio.run(summarizer._summarize_sections(contents))
+
+
+def test_summarize_sections_maps_sections_to_articles(summarizer):
+    contents = [{'content': 'a'}, {'content': ''}, {'content': 'c'}]
+    # An extra section beyond the article count is ignored
+    text = "===ARTICLE 1===\nsummary a\n===ARTICLE 3===\nsummary c\n===ARTICLE 4===\nstray"
+    assert _run_sections(summarizer, contents, text) == [
+        {'content': 'a', 'summary': 'summary a'},
+        None,
+        {'content': 'c', 'summary': 'summary c'},
+    ]
+
+
+def test_summarize_sections_returns_none_for_missing_sections(summarizer):
+    contents = [{'content': 'a'}, {'content': 'b'}]
+    assert _run_sections(summarizer, contents, "===ARTICLE 1===\nsummary a") is None
+    assert _run_sections(summarizer, contents, "===ARTICLE 1===\nsummary a\n===ARTICLE 2===\n") is None
+    assert _run_sections(summarizer, contents, "No markers at all") is None